@@ -29,21 +29,33 @@ class Button:
                self.rect.height)
 
     def highlighted(self):
-        '''is called if the mouse is above the button, changes the size of the mouse'''
+        '''is called if the mouse is above the button, changes the size of the mouse,
+        returns True if the size has changed'''
         x, y, w, h = self.params()
         pos = pg.mouse.get_pos()
-        if inRect(Point(pos), x, y, w, h):
+        size = self.size
+        if inRect(pos, x, y, w, h):
             self.size = self.original_size + 5
         else:
             self.size = self.original_size
+        return self.size != size
 
     def triggered(self, channel=None, sound=None, playing=False):
         '''returns True if the button is pressed'''
         x, y, w, h = self.params()
-        pos = pg.mouse.get_pos()
-        if inRect(Point(pos), x, y, w, h) and channel and sound and playing:
+        pressed = inRect(pg.mouse.get_pos(), x, y, w, h)
+        if pressed and channel and sound and playing:
             channel.play(sound)
-        return inRect(Point(pos), x, y, w, h)
+        return pressed
+
+    def area(self):
+        '''returns the rectangle the button covers when it is highlighted'''
+        if self.text:
+            rect = textRect(self.text, self.original_size + 5)
+        else:
+            rect = self.bigger_img.get_rect()
+        rect.center = self.pos
+        return rect
 
     def imgUpdate(self):
         if self.img:
@@ -1,346 +1,620 @@
 import pygame as pg
 import sys
+import time
 from os import path
+from concurrent.futures import ThreadPoolExecutor
 from math import sqrt
 from consts import *
 from funcs import *
+from engine import *
+from hsearch import HSearch
+from heatmap import Heatmap
+from mcts import ParallelMCTS
+from record import Archive, cellName
+from book import Book
+from net import Remote
+from profiler import FrameProfiler
 from Button import *
 
 class Game:
-    def __init__(self, size):
+    # boards with empty grids, keyed by (board size, tile size)
+    layers = {}
+
+    def __init__(self, size, launched=None):
+        # when the program started, to measure the time to the first frame
+        self.launched = launched or time.perf_counter()
+        self.first_frame = None
+        self.startup = False
         pg.init()
-        pg.mixer.init()
+        try:
+            pg.mixer.init()
+        except pg.error:
+            # no sound device, the game is played silently
+            pass
         self.screen = pg.display.set_mode((W, H))
         self.clock = pg.time.Clock()
         self.size = size
-        self.setTileSize()
-        self.state = [[0 for _ in range(self.size)] for __ in range(self.size)]
-        self.origin = Point(W/2 - (H/2-50)/sqrt(3), 50)
-        self.move = 1
-        self.started = False
         self.sound_state = True
+        self.music_state = False
+        self.profiler = FrameProfiler()
+        self.click_sound_channel = pg.mixer.Channel(2) if pg.mixer.get_init() else None
+        # the computer searches in worker processes, waited on by a thread so the frames keep coming
+        self.ai_state = False
+        self.ai = ParallelMCTS(workers=AI_WORKERS, time_limit=AI_TIME)
+        self.ai_worker = ThreadPoolExecutor(max_workers=1)
+        self.book = Book(path.join(path.dirname(__file__), BOOK))
+        self.thinking = None
+        # a connection to a game server, None for games in this window only
+        self.remote = None
+        # virtual connections of the positions, kept across games by position hash and worked out
+        # in a thread, the frames go on with the hints of the last position until it is done
+        self.hsearch = HSearch()
+        self.hint_worker = ThreadPoolExecutor(max_workers=1)
+        self.hints = False
+        self.hinting = None
+        self.hinted = []
+        # win chances of the empty cells, worked out in a thread while the frames go on
+        self.heatmap = Heatmap(self.heated)
+        self.heat_state = False
+        self.heat_shown = None
+        # the colours the tinted cells have on the board layer
+        self.heat_tints = {}
+        self.reset()
+
+    def reset(self, seat=True):
+        '''starts a new game on a board of the current size, online it also asks the server for a seat'''
+        if self.remote and seat:
+            self.seat = None
+            if self.join is not None:
+                self.remote.send('JOIN {}'.format(self.join))
+                self.join = None
+            else:
+                self.remote.send('PLAY {}'.format(self.size))
+        self.setTileSize()
+        self.board = Board(self.size)
+        self.stopThinking()
+        # the board screen starts the heat map again once the game is shown
+        self.heatmap.stop()
+        self.hint()
+        self.hovered = None
+        # the board layer with the stones stamped on it, built on the first showGrid
+        self.canvas = None
+        # one pixel column per cell for zoomed out large boards, built when first needed
+        self.minimap = None
+        # a line about the online game at the bottom of the board, and where it was drawn last
+        self.status = ''
+        self.status_shown = None
+        self.dirty = []
+        self.redraw = True
 
     def loadData(self):
-        '''load all the data (images, files, etc)'''
-        game_folder = path.dirname(__file__)
-        img_folder = path.join(game_folder, 'img')
-        doc_folder = path.join(game_folder, 'docs')
-        #------------------IMAGES------------------
-        # image for tiles (optional)
-        #self.tile_img = pg.image.load(path.join(img_folder, TILE_IMG)).convert_alpha()
-        #self.tile_img = pg.transform.scale(self.tile_img, (2*self.tile_size+1, int(self.tile_size*sqrt(3))+1))
-
-        self.bg_img = pg.image.load(path.join(img_folder, BG_IMG)).convert_alpha()
-        self.pause_img = pg.image.load(path.join(img_folder, PAUSE_IMG)).convert_alpha()
-        self.back_img = pg.image.load(path.join(img_folder, BACK_IMG)).convert_alpha()
-        self.up_img = pg.image.load(path.join(img_folder, UP_IMG)).convert_alpha()
-        self.down_img = pg.image.load(path.join(img_folder, DOWN_IMG)).convert_alpha()
-
-        #------------------MUSIC--------------------
-        self.bg_music = pg.mixer.Sound(path.join(doc_folder, BACKGROUND_MUSIC))
-        self.bg_music_channel = pg.mixer.Channel(1)
-        self.bg_music_channel.play(self.bg_music, loops=-1)
-        self.bg_music_channel.set_volume(0.5)
-        self.click_sound = pg.mixer.Sound(path.join(doc_folder, CLICK_SOUND))
-        self.click_sound_channel = pg.mixer.Channel(2)
-
-        #-----------------TEXT--------------------
-        with open(path.join(doc_folder, RULES), 'r') as f:
-            self.rules_text = ''.join(f.readlines())
+        '''starts the music, images, sounds and texts are loaded by funcs.loadImage and friends
+        the first time a screen needs them'''
+        self.music_state = playMusic(BACKGROUND_MUSIC)
+
+    @property
+    def click_sound(self):
+        return loadSound(CLICK_SOUND)
+
+    def connect(self, host, port, join=None):
+        '''plays the following games on a server, join is the id of a game a friend has opened'''
+        self.remote = Remote(host, port)
+        self.join = join
+        # the player this window moves for, known once the server has seated us
+        self.seat = None
+
+    def sync(self):
+        '''applies what the server has sent since the last frame'''
+        if not self.remote:
+            return
+        try:
+            for words in self.remote.poll():
+                self.apply(words)
+        except (OSError, ValueError, IndexError) as e:
+            # a server that sends what is not the protocol, undecodable bytes included, is left like a closed one
+            self.tell('disconnected: {}'.format(e))
+            self.remote.close()
+            self.remote = None
+
+    def apply(self, words):
+        '''applies one line from the server'''
+        if not words:
+            return
+        if words[0] == 'GAME':
+            game_id, self.seat, size = words[1], int(words[2]), int(words[3])
+            if size != self.size:
+                # a joined game may be of another size than the one in the settings
+                self.size = size
+                self.reset(seat=False)
+                self.heat()
+            self.tell('game {}, playing {}'.format(game_id, 'green' if self.seat == 1 else 'blue'))
+        elif words[0] == 'MOVE':
+            r, c = self.board.coords(int(words[1]))
+            if self.board.get(r, c) == 0:
+                self.place(r, c)
+        elif words[0] == 'LEFT':
+            self.tell('the other player has left')
+        elif words[0] == 'ERR':
+            self.tell('server: {}'.format(' '.join(words[1:])))
+
+    def tell(self, text):
+        '''puts text on the status line, the line it replaces is cleared on the next update'''
+        self.status = text
+        if self.status_shown:
+            self.dirty.append(self.status_shown)
+            self.status_shown = None
+
+    def showStatus(self):
+        '''writes the status line from the bottom left corner, returns the rectangles it covers'''
+        if not self.status:
+            return []
+        text = renderText(self.status, STATUS_TEXT, ORANGE)
+        self.status_shown = self.screen.blit(text, text.get_rect(midleft=STATUS_POS))
+        return [self.status_shown]
 
     def setTileSize(self):
+        '''fits the whole board into the window, large boards can be zoomed in from there'''
         self.tile_size = 4*(H/2-50)/3/sqrt(3)/(self.size-1)
+        self.origin = Point(W/2 - (H/2-50)/sqrt(3), 50)
+        self.large = self.size > MAX_BOARD_SIZE
+        self.geometry = geometry(self.size, self.tile_size, self.outline())
+
+    def outline(self):
+        '''width of the hexagon outlines, thinner on zoomed out large boards'''
+        if not self.large:
+            return 4
+        return max(1, min(4, int(self.tile_size/5)))
+
+    def view(self, event):
+        '''pans and zooms the camera of a large board, returns True if the event was used for it'''
+        if not self.large:
+            return False
+        if event.type == pg.MOUSEWHEEL:
+            self.zoom(ZOOM_STEP**event.y, pg.mouse.get_pos())
+        elif event.type in (pg.MOUSEBUTTONDOWN, pg.MOUSEBUTTONUP) and event.button != 1:
+            # the wheel also comes as buttons 4 and 5, the middle and right buttons drag
+            pass
+        elif event.type == pg.MOUSEMOTION and (event.buttons[1] or event.buttons[2]):
+            self.pan(*event.rel)
+        elif event.type == pg.KEYDOWN and event.key in PAN_KEYS:
+            self.pan(*PAN_KEYS[event.key])
+        else:
+            return False
+        return True
+
+    def zoom(self, factor, pos):
+        '''scales the board around pos, from fitting the window up to MAX_TILE'''
+        fit = 4*(H/2-50)/3/sqrt(3)/(self.size-1)
+        a = min(MAX_TILE, max(fit, self.tile_size*factor))
+        k = a/self.tile_size
+        self.origin = Point(pos[0] - (pos[0]-self.origin.x)*k, pos[1] - (pos[1]-self.origin.y)*k)
+        self.tile_size = a
+        self.geometry = geometry(self.size, self.tile_size, self.outline())
+        self.moved()
+
+    def pan(self, dx, dy):
+        self.origin = Point(self.origin.x + dx, self.origin.y + dy)
+        self.moved()
+
+    def moved(self):
+        '''the camera has changed, so the visible part of the board is drawn again'''
+        self.clamp()
+        self.canvas = None
+        self.hovered = None
+        self.redraw = True
+
+    def clamp(self):
+        '''keeps the board where it can be seen: along a side where it is bigger than the window
+        it covers the window, along a side where it is smaller it stays inside'''
+        left, top, right, bottom = self.geometry.extent
+        x = min(max(self.origin.x, min(-left, W - right)), max(-left, W - right))
+        y = min(max(self.origin.y, min(-top, H - bottom)), max(-top, H - bottom))
+        self.origin = Point(x, y)
 
     def coords(self, r, c):
         '''translates grid coordinates to real coordinates'''
-        x = self.origin.x + c*3/2*self.tile_size
-        y = self.origin.y + (c+2*r)*self.tile_size*sqrt(3)/2
-        return int(x), int(y)
+        i = r*self.size + c
+        return int(self.origin.x + self.geometry.xs[i]), int(self.origin.y + self.geometry.ys[i])
+
+    def polygon(self, r, c):
+        '''the vertices of the hexagon of a cell on the screen'''
+        x, y = self.coords(r, c)
+        return [(x+dx, y+dy) for dx, dy in self.geometry.hexagon]
+
+    def cell(self, pos):
+        '''translates real coordinates to grid coordinates, returns None outside the board'''
+        c = (pos[0] - self.origin.x)*self.geometry.kx
+        r = (pos[1] - self.origin.y)*self.geometry.ky - c/2
+        c, r = hexRound(c, r)
+        if 0 <= r < self.size and 0 <= c < self.size:
+            return r, c
+        return None
 
     def tick(self, pos):
         '''is called if mouse pressed, changes the state of the game'''
-        for r in range(self.size):
-            for c in range(self.size):
-                x, y = self.coords(r, c)
-                if inHex(pos, x, y, self.tile_size) and self.state[r][c] != 2\
-                                                    and self.state[r][c] != 1:
-                    if self.sound_state:
-                        self.click_sound_channel.play(self.click_sound)
-                    self.state[r][c] = self.move
-                    self.move = 3-self.move
+        cell = self.cell(pos)
+        if cell is None:
+            return
+        if self.ai_state and self.board.move == AI_PLAYER:
+            return
+        if self.remote:
+            # online the stone is placed when the server sends the move back
+            if self.board.move == self.seat and self.board.get(*cell) == 0:
+                self.remote.send('MOVE {}'.format(self.board.index(*cell)))
+            return
+        if self.board.get(*cell) == 0:
+            self.place(*cell)
+
+    def place(self, r, c):
+        '''puts a stone of the player to move on an empty cell'''
+        if self.sound_state and self.click_sound_channel and self.click_sound:
+            self.click_sound_channel.play(self.click_sound)
+        self.board.play(self.board.index(r, c))
+        self.stamp(r, c)
+        self.heat()
+        self.hint()
+
+    def think(self):
+        '''starts the computer's search on its turn and plays the move once the search is over'''
+        if not self.ai_state or self.remote or self.board.move != AI_PLAYER or self.checkWin():
+            return
+        if self.thinking is None:
+            move = self.book.lookup(self.board)
+            if move is not None:
+                self.place(*self.board.coords(move))
+                return
+            self.thinking = self.ai_worker.submit(self.ai.search, self.board.copy())
+            self.thinking.add_done_callback(self.thought)
+        elif self.thinking.done():
+            move = self.thinking.result()
+            self.thinking = None
+            self.place(*self.board.coords(move))
+
+    def stopThinking(self):
+        '''drops the search in progress, the position it was started on has changed'''
+        if self.thinking:
+            # a search that has not started yet is dropped, a running one is stopped
+            self.thinking.cancel()
+            self.ai.cancel()
+            self.thinking = None
+
+    def seek(self, n):
+        '''moves through the history of the game to the position after n moves'''
+        if self.remote:
+            # the server does not take moves back
+            return
+        self.stopThinking()
+        for i in self.board.seek(n):
+            self.stamp(*self.board.coords(i))
+        self.heat()
+        self.hint()
+
+    def undo(self):
+        '''takes back the last move, against the computer also its move before that'''
+        n = len(self.board.history) - 1
+        if self.ai_state and n > 0 and 1 + n % 2 == AI_PLAYER:
+            n -= 1
+        self.seek(max(0, n))
+
+    def redo(self):
+        n = len(self.board.history) + 1
+        if self.ai_state and len(self.board.future) > 1 and 1 + n % 2 == AI_PLAYER:
+            n += 1
+        self.seek(n)
+
+    def heat(self):
+        '''restarts the heat map on the current position, or stops it when it is not shown'''
+        if self.heat_state and not self.large and not self.checkWin():
+            self.heatmap.start(self.board)
+        else:
+            self.heatmap.stop()
+
+    def hint(self):
+        '''starts H-search on the current position when the hints are shown, a search of an older
+        position that has not started yet is dropped'''
+        if self.hinting:
+            self.hinting.cancel()
+            self.hinting = None
+        if self.hints and self.size <= HINT_SIZE:
+            self.hinting = self.hint_worker.submit(self.hsearch.analyse, self.board.copy())
+            self.hinting.add_done_callback(self.analysed)
+
+    def analysed(self, future):
+        '''wakes the loop up when the hints are ready, runs in the H-search thread'''
+        if not future.cancelled() and pg.display.get_init():
+            pg.event.post(pg.event.Event(HINTS_DONE))
+
+    def heated(self):
+        '''wakes the loop up when the heat map has improved, runs in the heat map thread'''
+        if pg.display.get_init():
+            pg.event.post(pg.event.Event(HEATMAP_DONE))
+
+    def thought(self, future):
+        '''wakes the loop up when the computer's move is ready, runs in the search thread'''
+        if pg.display.get_init():
+            pg.event.post(pg.event.Event(AI_DONE))
 
     def highlight(self, pos):
         '''highlights the hexagon that is under the mouse'''
-        for r in range(self.size):
-            for c in range(self.size):
-                x, y = self.coords(r, c)
-                if self.state[r][c] == 0 and inHex(pos, x, y, self.tile_size):
-                    self.state[r][c] = self.move + 2
-                elif self.state[r][c] > 2 and not inHex(pos, x, y, self.tile_size):
-                    self.state[r][c] = 0
+        cell = self.cell(pos)
+        if not cell or self.board.get(*cell) != 0:
+            cell = None
+        if cell != self.hovered:
+            for old in (self.hovered, cell):
+                if old:
+                    self.dirty.append(self.hexRect(*old))
+            self.hovered = cell
+
+    def hexRect(self, r, c):
+        '''returns the screen rectangle covered by a hexagon and its outline'''
+        x, y = self.coords(r, c)
+        dx, dy, w, h = self.geometry.box
+        return pg.Rect(x+dx, y+dy, w, h)
+
+    def bounds(self):
+        '''returns the coloured triangles that mark the sides of each player'''
+        x, y = self.origin.x, self.origin.y
+        return [(col, [(x+dx, y+dy) for dx, dy in triangle]) for col, triangle in self.geometry.sides]
+
+    def layer(self):
+        '''returns the background with the destination sides and the empty grid, drawn once per size'''
+        key = (self.size, self.tile_size)
+        if key not in Game.layers:
+            surface = pg.Surface((W, H))
+            surface.blit(loadImage(BG_IMG), (0, 0))
+            for col, polygon in self.bounds():
+                pg.draw.polygon(surface, col, polygon)
+            for r in range(self.size):
+                for c in range(self.size):
+                    drawPolygon(surface, DARKRED, LIGHTYELLOW, self.polygon(r, c))
+            Game.layers[key] = surface
+        return Game.layers[key]
+
+    def visible(self):
+        '''yields the cells whose hexagons are at least partly inside the window'''
+        a = self.tile_size
+        h = a*sqrt(3)
+        c0 = max(0, int((-a - self.origin.x)/(3/2*a)))
+        c1 = min(self.size-1, int((W + a - self.origin.x)/(3/2*a)) + 1)
+        for c in range(c0, c1+1):
+            r0 = max(0, int((-h/2 - self.origin.y)/h - c/2))
+            r1 = min(self.size-1, int((H + h/2 - self.origin.y)/h - c/2) + 1)
+            for r in range(r0, r1+1):
+                yield r, c
+
+    def render(self):
+        '''draws the part of a large board inside the window, the work depends on the window and not the board'''
+        surface = pg.Surface((W, H))
+        surface.blit(loadImage(BG_IMG), (0, 0))
+        for col, polygon in self.bounds():
+            pg.draw.polygon(surface, col, polygon)
+        if self.tile_size < DETAIL_TILE:
+            self.renderCells(surface)
+            return surface
+        width = self.outline()
+        sprites = [hexSprite(col, LIGHTYELLOW, self.tile_size, width) for col in (DARKRED, GREEN, BLUE)]
+        cells = self.board.cells
+        for r, c in self.visible():
+            sprite = sprites[cells[r*self.size + c]]
+            surface.blit(sprite, sprite.get_rect(center=self.coords(r, c)))
+        return surface
+
+    def mark(self, r, c):
+        '''colours the pixels of a cell in the minimap'''
+        col = (DARKRED, GREEN, BLUE)[self.board.get(r, c)]
+        self.minimap.set_at((c, c+2*r), col)
+        self.minimap.set_at((c, c+2*r+1), col)
+
+    def renderCells(self, surface):
+        '''scales the visible part of the minimap into place, a cell is one pixel wide and two pixels high
+        so that column c and row c+2r line up with the hexagonal grid'''
+        if self.minimap is None:
+            self.minimap = pg.Surface((self.size, 3*self.size-1), pg.SRCALPHA)
+            self.minimap.fill((0, 0, 0, 0))
+            for r in range(self.size):
+                for c in range(self.size):
+                    self.mark(r, c)
+        sx = 3/2*self.tile_size
+        sy = self.tile_size*sqrt(3)/2
+        c0 = max(0, int(-self.origin.x/sx))
+        c1 = min(self.size, int((W - self.origin.x)/sx) + 2)
+        k0 = max(0, int(-self.origin.y/sy))
+        k1 = min(3*self.size-1, int((H - self.origin.y)/sy) + 3)
+        if c0 >= c1 or k0 >= k1:
+            return
+        part = self.minimap.subsurface((c0, k0, c1-c0, k1-k0))
+        part = pg.transform.scale(part, (int((c1-c0)*sx)+1, int((k1-k0)*sy)+1))
+        surface.blit(part, (self.origin.x + (c0-1/2)*sx, self.origin.y + (k0-1)*sy))
+
+    def stamp(self, r, c):
+        '''draws a placed stone onto the board layer and marks it for updating'''
+        if self.minimap is not None:
+            self.mark(r, c)
+        if self.canvas is None:
+            return
+        if self.large and self.tile_size < DETAIL_TILE:
+            # the scaled minimap is drawn again as a whole
+            self.canvas = None
+            self.redraw = True
+            return
+        # a cell emptied by an undo is drawn empty again
+        col = (DARKRED, GREEN, BLUE)[self.board.get(r, c)]
+        drawPolygon(self.canvas, col, LIGHTYELLOW, self.polygon(r, c), self.outline())
+        self.dirty.append(self.hexRect(r, c))
 
     def showGrid(self):
         '''shows hexagonal grid as well as players moves and destination sides'''
-        # draw bounds
-        A = (self.origin.x-self.tile_size, self.origin.y-self.tile_size*sqrt(3))
-        B = (self.origin.x-self.tile_size/2*(1-3*self.size),\
-             self.origin.y+self.tile_size*sqrt(3)/2*(self.size-2)+self.tile_size*sqrt(3)/6)
-        C = (self.origin.x-self.tile_size/2*(1-3*self.size), self.origin.y+self.tile_size*sqrt(3)/2*(2*self.size+self.size-1))
-        D = (self.origin.x-self.tile_size, self.origin.y+self.tile_size*sqrt(3)*(self.size-1/2)-self.tile_size*sqrt(3)/6)
-        M = ((A[0]+B[0])/2, (B[1]+C[1])/2)
-        pg.draw.polygon(self.screen, GREEN, [A, B, M])
-        pg.draw.polygon(self.screen, GREEN, [C, D, M])
-        pg.draw.polygon(self.screen, BLUE, [B, C, M])
-        pg.draw.polygon(self.screen, BLUE, [D, A, M])
-        for r in range(self.size):
-            for c in range(self.size):
-                x, y = self.coords(r, c)
-                # draw a tile
-                #self.screen.blit(self.tile_img, (x-self.tile_size, y-self.tile_size))
-                # draw players
-                if self.state[r][c] == 1:
-                    drawHex(self.screen, GREEN, LIGHTYELLOW, (x, y), self.tile_size)
-                elif self.state[r][c] == 2:
-                    drawHex(self.screen, BLUE, LIGHTYELLOW, (x, y), self.tile_size)
-                elif self.state[r][c] == 3:
-                    drawHex(self.screen, LIGHTGREEN, LIGHTYELLOW, (x, y), self.tile_size)
-                elif self.state[r][c] == 4:
-                    drawHex(self.screen, LIGHTBLUE, LIGHTYELLOW, (x, y), self.tile_size)
-                else:
-                    drawHex(self.screen, DARKRED, LIGHTYELLOW, (x, y), self.tile_size)
+        if self.canvas is None and self.large:
+            self.canvas = self.render()
+        elif self.canvas is None:
+            self.canvas = self.layer().copy()
+            for r in range(self.size):
+                for c in range(self.size):
+                    if self.board.get(r, c):
+                        self.stamp(r, c)
+            self.heat_shown = None
+            self.heat_tints = {}
+        self.showHeat()
+        self.screen.blit(self.canvas, (0, 0))
+        if self.hovered:
+            col = LIGHTGREEN if self.board.move == 1 else LIGHTBLUE
+            drawPolygon(self.screen, col, LIGHTYELLOW, self.polygon(*self.hovered), self.outline())
+
+    def showHeat(self):
+        '''tints the empty cells from dark red for the worst for the player to move to orange for the best,
+        a new snapshot is drawn onto the board layer only where the tints have changed'''
+        snapshot = self.heatmap.current(self.board) if self.heat_state else None
+        if snapshot is self.heat_shown:
+            return
+        self.heat_shown = snapshot
+        tints = self.tints(snapshot)
+        for i in self.heat_tints.keys() - tints.keys():
+            # a cell that has been played or is no longer rated is drawn as it is
+            self.stamp(*divmod(i, self.size))
+        for i, col in tints.items():
+            if self.heat_tints.get(i) != col:
+                r, c = divmod(i, self.size)
+                drawPolygon(self.canvas, col, LIGHTYELLOW, self.polygon(r, c), self.outline())
+                self.dirty.append(self.hexRect(r, c))
+        self.heat_tints = tints
+
+    def tints(self, snapshot):
+        '''the colours of the rated cells of a snapshot by cell, in HEAT_LEVELS steps so that
+        a cell is drawn again only when its value has changed enough to be seen'''
+        rated = [v for v in snapshot.values if v is not None] if snapshot else []
+        if not rated:
+            return {}
+        low, high = min(rated), max(rated)
+        steps = HEAT_LEVELS - 1
+        return {i: blend(DARKRED, ORANGE, round((value - low)/(high - low)*steps)/steps if high > low else 0.5)
+                for i, value in enumerate(snapshot.values) if value is not None}
+
+    def showHints(self):
+        '''marks the cells that win for the player to move and the ones they have to play to stay
+        in the game, writes who has a proved win, returns the rectangles of these and the last ones'''
+        rects, self.hinted = self.hinted, []
+        if not self.hints or self.hinting is None or not self.hinting.done():
+            return rects
+        analysis = self.hinting.result()
+        col = (GREEN, BLUE)[self.board.move-1]
+        radius = max(3, self.tile_size//3)
+        for i in analysis.wins:
+            self.hinted.append(pg.draw.circle(self.screen, col, self.coords(*divmod(i, self.size)), radius))
+        for i in analysis.mustplay or ():
+            self.hinted.append(pg.draw.circle(self.screen, RED, self.coords(*divmod(i, self.size)), radius, 3))
+        if analysis.winner:
+            text = '{} wins'.format(('Green', 'Blue')[analysis.winner-1])
+            textOut(self.screen, text, HINT_TEXT, (GREEN, BLUE)[analysis.winner-1], HINT_POS)
+            rect = textRect(text, HINT_TEXT)
+            rect.center = HINT_POS
+            self.hinted.append(rect)
+        return rects + self.hinted
+
+    def historyRows(self):
+        '''the rows of the history panel as (number of moves, cell, player), played moves are
+        followed by the ones that were taken back, the list is scrolled to the current move'''
+        moves = list(self.board.history) + self.board.future[::-1].tolist()
+        start = max(0, min(len(self.board.history) - HISTORY_ROWS + 3, len(moves) - HISTORY_ROWS))
+        return [(k+1, moves[k], 1 + k % 2) for k in range(start, min(len(moves), start + HISTORY_ROWS))]
+
+    def showHistory(self):
+        '''draws the moves of the game in the top right corner, returns the rectangle it covers'''
+        x, y = HISTORY_POS
+        textOut(self.screen, 'Moves', HISTORY_TEXT, ORANGE, (x, y))
+        played = len(self.board.history)
+        for row, (k, i, player) in enumerate(self.historyRows()):
+            col = (GREEN, BLUE)[player-1] if k <= played else GRAY
+            text = '{}{} {}'.format('>' if k == played else '', k, cellName(self.size, i))
+            textOut(self.screen, text, HISTORY_TEXT, col, (x, y + (row+1)*HISTORY_ROW))
+        return pg.Rect(x - HISTORY_WIDTH/2, y - HISTORY_ROW/2, HISTORY_WIDTH, (HISTORY_ROWS+1)*HISTORY_ROW)
+
+    def historyAt(self, pos):
+        '''returns the number of moves of the history row under pos, None for the title and outside the rows'''
+        x, y = HISTORY_POS
+        if abs(pos[0] - x) > HISTORY_WIDTH/2:
+            return None
+        row = int((pos[1] - y + HISTORY_ROW/2)//HISTORY_ROW)
+        rows = self.historyRows()
+        if 0 < row <= len(rows):
+            return rows[row-1][0]
+        return None
 
     def checkWin(self):
         '''checks if any of the players have won'''
-        for y in range(self.size):
-            if self.state[y][0] == 2:
-                if DFS(Point(y, 0), self.state, lambda v: (v.Y == self.size-1), 2):
-                    return 2
+        return self.board.winner()
 
-        for x in range(self.size):
-            if self.state[0][x] == 1:
-                if DFS(Point(0, x), self.state, lambda v: (v.X == self.size-1), 1):
-                    return 1
-        return 0
+    def saveRecord(self):
+        '''appends the moves of the game that has just ended to the archive'''
+        archive = Archive(path.join(path.dirname(__file__), ARCHIVE))
+        archive.append(self.size, self.checkWin(), self.board.history)
+        archive.close()
 
     def shadow(self):
         shadow = pg.Surface((W, H))
         shadow.set_alpha(200)
         self.screen.blit(shadow, (0, 0))
 
-    def startScreen(self):
-        '''shows start screen, returns True if the game has started'''
-        start = True
-        # initializing buttons
-        play = Button((W/2, 2*H/3), 80, 'Play')
-        settings = Button((150, H-75), 50, 'Settings')
-        rules = Button((W-100, H-75), 50, 'Rules')
-        buttons = [play, settings, rules]
-        while start:
-            # sticking to fps
-            self.clock.tick(FPS)
-            # --------------------EVENTS---------------------
-            for event in pg.event.get():
-                if event.type == pg.QUIT:
-                    # if exit button is pressed
-                    return False
-                elif event.type == pg.MOUSEBUTTONDOWN:
-                    # if mouse is pressed check button overlapping
-                    if play.triggered(channel=self.click_sound_channel,
-                                      sound=self.click_sound,
-                                      playing=self.sound_state):
-                        self.__init__(self.size)
-                        self.started = True
-                        return True
-                    if rules.triggered(channel=self.click_sound_channel,
-                                       sound=self.click_sound,
-                                       playing=self.sound_state):
-                        start = self.rulesScreen()
-                    if settings.triggered(channel=self.click_sound_channel,
-                                          sound=self.click_sound,
-                                          playing=self.sound_state):
-                        start = self.settingsScreen()
-            # highlight buttons
-            for button in buttons:
-                button.highlighted()
-            # --------------------STUFF-----------------------
-            self.screen.blit(self.bg_img, (0, 0))
-            textOut(self.screen, 'HEX', 200, ORANGE, (W/2, H/3))
-            # show buttons
-            for button in buttons:
-                button.show(self.screen)
-            # double processing
-            pg.display.flip()
-
-    def rulesScreen(self):
-        '''shows the rules of the game, returns True if the "back" button was hit'''
-        start = True
-        # initializing buttons
-        back = Button((30, 30), 50, img=self.back_img)
-        buttons = [back]
-        while start:
-            # sticking to fps
-            self.clock.tick(FPS)
-            # --------------------EVENTS---------------------
-            for event in pg.event.get():
-                if event.type == pg.QUIT:
-                    # if exit button is pressed
-                    return False
-                elif event.type == pg.MOUSEBUTTONDOWN:
-                    # if mouse is pressed check button overlapping
-                    if back.triggered(channel=self.click_sound_channel,
-                                      sound=self.click_sound,
-                                      playing=self.sound_state):
-                        return True
-            # highlight buttons
-            for button in buttons:
-                button.highlighted()
-            # --------------------STUFF-----------------------
-            self.screen.blit(self.bg_img, (0, 0))
-            textOut(self.screen, 'Rules', 100, ORANGE, (W/2, H/3))
-            textOutMultiline(self.screen, self.rules_text, 30, BLACK, (W/2, H/3))
-            # show buttons
-            for button in buttons:
-                button.show(self.screen)
-            # double processing
-            pg.display.flip()
-
-    def settingsScreen(self):
-        '''shows the rules of the game, returns True if the "back" button was hit'''
-        start = True
-        # initializing buttons
-        back = Button((30, 30), 50, img=self.back_img)
-        up = Button((2*W/3+60, H/2-25), 50, img=self.up_img)
-        down = Button((2*W/3+60, H/2+25), 50, img=self.down_img)
-        music_state = 'On' if self.bg_music_channel.get_busy() else 'Off'
-        sound_state = 'On' if self.sound_state else 'Off'
-        music_switch = Button((2*W/3-50, H/2+60), 50, music_state, col=DARKRED)
-        sound_switch = Button((2*W/3-50, H/2+120), 50, sound_state, col=DARKRED)
-        buttons = [back, up, down, music_switch, sound_switch]
-        while start:
-            # sticking to fps
-            self.clock.tick(FPS)
-            # --------------------EVENTS---------------------
-            for event in pg.event.get():
-                if event.type == pg.QUIT:
-                    # if exit button is pressed
-                    return False
-                elif event.type == pg.MOUSEBUTTONDOWN:
-                    # if mouse is pressed check button overlapping
-                    if back.triggered(channel=self.click_sound_channel,
-                                      sound=self.click_sound,
-                                      playing=self.sound_state):
-                        return True
-                    if up.triggered(channel=self.click_sound_channel,
-                                    sound=self.click_sound,
-                                    playing=self.sound_state):
-                        self.size = min(MAX_BOARD_SIZE, self.size+1)
-                    if down.triggered(channel=self.click_sound_channel,
-                                      sound=self.click_sound,
-                                      playing=self.sound_state):
-                        self.size = max(MIN_BOARD_SIZE, self.size-1)
-                    if music_switch.triggered(channel=self.click_sound_channel,
-                                              sound=self.click_sound,
-                                              playing=self.sound_state):
-                        if music_switch.text == 'On':
-                            self.bg_music_channel.stop()
-                            music_switch.text = 'Off'
-                        else:
-                            self.bg_music_channel.play(self.bg_music, loops=-1)
-                            music_switch.text = 'On'
-                    if sound_switch.triggered(channel=self.click_sound_channel,
-                                              sound=self.click_sound,
-                                              playing=self.sound_state):
-                        if sound_switch.text == 'On':
-                            self.sound_state = False
-                            sound_switch.text = 'Off'
-                        else:
-                            self.sound_state = True
-                            sound_switch.text = 'On'
-            # highlight buttons
-            for button in buttons:
-                button.highlighted()
-            # --------------------STUFF-----------------------
-            self.screen.blit(self.bg_img, (0, 0))
-            textOut(self.screen, 'Settings', 100, ORANGE, (W/2, H/4))
-            textOut(self.screen, 'Board size:', 50, BLACK, (W/3, H/2))
-            textOut(self.screen, self.size, 50, BLACK, (2*W/3, H/2))
-            textOut(self.screen, 'Music:', 50, BLACK, (W/3, H/2+60))
-            textOut(self.screen, 'Sound:', 50, BLACK, (W/3, H/2+120))
-
-            # show buttons
-            for button in buttons:
-                button.show(self.screen)
-            # double processing
-            pg.display.flip()
-
-    def pauseScreen(self):
-        '''shows pause screen, returns True if the game was resumed'''
-        start = True
-        # initializing buttons
-        resume = Button((W/2, H/3), 80, 'Resume', col=ORANGE)
-        home = Button((W/2, H/2), 50, 'Home', col=WHITE)
-        buttons = [home, resume]
-        while start:
-            # sticking to fps
-            self.clock.tick(FPS)
-            # --------------------EVENTS---------------------
-            for event in pg.event.get():
-                if event.type == pg.QUIT:
-                    # if exit button is pressed
-                    return False
-                elif event.type == pg.MOUSEBUTTONDOWN:
-                    # if mouse is pressed check button overlapping
-                    if home.triggered(channel=self.click_sound_channel,
-                                      sound=self.click_sound,
-                                      playing=self.sound_state):
-                        self.started = False
-                        return True
-                    if resume.triggered(channel=self.click_sound_channel,
-                                        sound=self.click_sound,
-                                        playing=self.sound_state):
-                        return True
-            # highlight buttons
-            for button in buttons:
-                button.highlighted()
-            # --------------------STUFF-----------------------
-            # show buttons
-            self.screen.blit(self.bg_img, (0, 0))
-            self.showGrid()
-            self.shadow()
-            for button in buttons:
-                button.show(self.screen)
-            # double processing
-            pg.display.flip()
-
-    def GOScreen(self, winner):
-        '''shows game over screen, returns True if any key is hit'''
-        go = True
-        home = Button((W/2, 2*H/3), 50, 'Home', col=WHITE)
-        while go:
-            # sticking to fps
+    def backdrop(self):
+        '''returns a copy of the shadowed board for the screens shown on top of the game'''
+        self.hovered = None
+        self.showGrid()
+        self.shadow()
+        return self.screen.copy()
+
+    def flip(self):
+        '''shows the whole screen, the first time it also notes how long the start took'''
+        self.profiler.show(self.screen)
+        pg.display.flip()
+        if self.first_frame is None:
+            self.first_frame = time.perf_counter() - self.launched
+            if self.startup:
+                print('first frame after {:.1f} ms'.format(self.first_frame*1000))
+                pg.event.post(pg.event.Event(pg.QUIT))
+
+    def run(self, screen):
+        '''runs the screens of the game until one of them quits, a screen is drawn only after
+        something has invalidated it and the loop sleeps until the next event otherwise'''
+        screen.enter()
+        while screen is not None:
+            self.profiler.begin(screen.name)
+            if screen.invalid or self.dirty or self.redraw or self.profiler.visible:
+                screen.draw()
+                self.profiler.lap('draw')
+                rects = screen.rects()
+                if rects is None:
+                    self.redraw = True
+                # double processing
+                self.update(rects or ())
+                screen.invalid = False
+                self.profiler.lap('flip')
+            # sticking to fps while there are events, sleeping until the next one when there are none
             self.clock.tick(FPS)
-            # --------------------EVENTS---------------------
-            for event in pg.event.get():
-                if event.type == pg.QUIT:
-                    # if exit button is pressed
-                    return False
-                elif event.type == pg.MOUSEBUTTONDOWN:
-                    # if mouse is pressed check button overlapping
-                    if home.triggered(channel=self.click_sound_channel,
-                                      sound=self.click_sound,
-                                      playing=self.sound_state):
-                        self.started = False
-                        return True
-            home.highlighted()
-            # --------------------STUFF-----------------------
-            self.screen.blit(self.bg_img, (0, 0))
-            self.showGrid()
-            self.shadow()
-            textOut(self.screen, 'GAME OVER', 80, ORANGE, (W/2, H/3))
-            if winner == 2:
-                textOut(self.screen, 'Blue won', 60, BLUE, (W/2, H/2))
-            else:
-                textOut(self.screen, 'Green won', 60, GREEN, (W/2, H/2))
-            home.show(self.screen)
-            # double processing
-            pg.display.flip()
+            timeout = POLL_TIME if self.profiler.visible else screen.timeout()
+            events = [pg.event.wait(timeout)] + pg.event.get()
+            self.profiler.lap('wait')
+            current = screen
+            for event in events:
+                if self.profiler.handle(event):
+                    screen.invalid = True
+                elif event.type in (pg.VIDEOEXPOSE, pg.WINDOWEXPOSED):
+                    self.redraw = True
+                else:
+                    screen = screen.handle(event)
+                    if screen is not current:
+                        break
+            self.profiler.lap('events')
+            if screen is current:
+                screen = screen.update()
+            if screen is not current:
+                current.leave()
+                if screen is not None:
+                    screen.enter()
+
+    def update(self, rects=()):
+        '''updates only the changed parts of the display, or all of it after a screen switch'''
+        if self.redraw:
+            self.flip()
+            self.redraw = False
+        else:
+            pg.display.update(self.dirty + list(rects) + self.profiler.show(self.screen))
+        self.dirty = []
@@ -1,51 +1,29 @@
+import time
+launched = time.perf_counter()
 import pygame as pg
 import random
+import argparse
 from pprint import pprint
 from funcs import *
 from Game import *
+from screens import StartScreen
 from consts import *
 
-game = Game(SIZE)
-game.loadData()
+# the AI's worker processes import this file again, they must not start a game of their own
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Hex')
+    parser.add_argument('--connect', metavar='HOST:PORT', help='play against someone else through a game server (net.py)')
+    parser.add_argument('--join', type=int, metavar='ID', help='join the game a friend has opened on the server')
+    parser.add_argument('--startup', action='store_true', help='print the time to the first frame and quit')
+    args = parser.parse_args()
 
-# button initializing
-pause = Button((30, 30), 50, img=game.pause_img)
-buttons = [pause]
+    game = Game(SIZE, launched)
+    game.startup = args.startup
+    game.loadData()
+    if args.connect:
+        host, _, port = args.connect.rpartition(':')
+        game.connect(host, int(port), args.join)
 
-# draw()
-run = True
-while run:
-    # sticking to fps
-    game.clock.tick(FPS)
-    if not game.started:
-        run = game.startScreen()
-    else:
-        # --------------------EVENTS---------------------
-        game.highlight(pg.mouse.get_pos())
-        for event in pg.event.get():
-            if event.type == pg.QUIT:
-                # if exit button is pressed
-                run = False
-            elif event.type == pg.MOUSEBUTTONDOWN:
-                # the players move
-                game.tick(pg.mouse.get_pos())
-                if pause.triggered(channel=game.click_sound_channel,
-                                   sound=game.click_sound,
-                                   playing=game.sound_state):
-                    run = game.pauseScreen()
+    game.run(StartScreen(game))
 
-        # highlight buttons
-        for button in buttons:
-            button.highlighted()
-
-        # --------------------STUFF-----------------------
-        game.screen.blit(game.bg_img, (0, 0))
-        game.showGrid()
-        for button in buttons:
-            button.show(game.screen)
-        if game.checkWin():
-            run = game.GOScreen(game.checkWin())
-    # double processing
-    pg.display.flip()
-
-pg.quit()
+    pg.quit()
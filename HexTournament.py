@@ -0,0 +1,190 @@
+'''Plays matches between computer players without a display
+
+    python HexTournament.py --players random mcts:500 mcts:0.2s --sizes 7 11 --games 20
+
+Every game is appended to the results file as one JSON line as soon as it ends,
+running the same command again skips the games that are already there.
+Player types: "random", "mcts:N" (N iterations per move) and "mcts:Ts" (T seconds per move).
+'''
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import zlib
+from math import log10
+from itertools import permutations
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from engine import Board
+from mcts import MCTS
+
+
+class RandomPlayer:
+    def move(self, board):
+        return random.choice(board.legalMoves())
+
+
+class MCTSPlayer:
+    def __init__(self, time_limit=None, iterations=None):
+        self.ai = MCTS(time_limit=time_limit, iterations=iterations)
+
+    def move(self, board):
+        return self.ai.search(board)
+
+
+def makePlayer(spec):
+    '''builds a player from its name on the command line'''
+    kind, _, arg = spec.partition(':')
+    if kind == 'random' and not arg:
+        return RandomPlayer()
+    if kind == 'mcts':
+        try:
+            budget = float(arg[:-1]) if arg.endswith('s') else int(arg)
+        except ValueError:
+            raise ValueError('unknown player {!r}'.format(spec)) from None
+        # without a budget the search would never end
+        if not budget > 0:
+            raise ValueError('player {!r} needs a positive number of iterations or seconds'.format(spec))
+        if arg.endswith('s'):
+            return MCTSPlayer(time_limit=budget)
+        return MCTSPlayer(iterations=budget)
+    raise ValueError('unknown player {!r}'.format(spec))
+
+
+def playGame(job):
+    '''plays one game in a worker process, the rules are the ones the game uses (Board.winner)'''
+    random.seed(job['seed'])
+    board = Board(job['size'])
+    players = {1: makePlayer(job['green']), 2: makePlayer(job['blue'])}
+    latency = {1: [], 2: []}
+    while not board.winner():
+        start = time.perf_counter()
+        move = players[board.move].move(board)
+        latency[board.move].append((time.perf_counter() - start)*1000)
+        board.play(move)
+    return dict(job, winner=board.winner(), moves=list(board.history),
+                green_ms=latency[1], blue_ms=latency[2])
+
+
+def schedule(players, sizes, games):
+    '''every ordered pair of players meets on every size, so both get to move first'''
+    jobs = []
+    for size in sizes:
+        for green, blue in permutations(players, 2):
+            for k in range(games):
+                name = '{}:{}:{}:{}'.format(size, green, blue, k)
+                jobs.append({'id': name, 'size': size, 'green': green, 'blue': blue,
+                             'seed': zlib.crc32(name.encode())})
+    return jobs
+
+
+def trim(filename):
+    '''cuts off a last line left unfinished by an interruption, so the next result starts a line of its own'''
+    if not os.path.exists(filename):
+        return
+    with open(filename, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+
+
+def load(filename):
+    '''reads the results written so far, a line cut short by an interruption is ignored'''
+    results = []
+    if os.path.exists(filename):
+        with open(filename) as f:
+            for line in f:
+                try:
+                    results.append(json.loads(line))
+                except ValueError:
+                    pass
+    return results
+
+
+def ratings(results, rounds=200):
+    '''Elo ratings from a Bradley-Terry fit of all games, every player also gets
+    one virtual draw against an average player so that a player without wins stays finite'''
+    players = sorted({r['green'] for r in results} | {r['blue'] for r in results})
+    strength = {p: 1.0 for p in players}
+    wins = {p: 0.5 for p in players}
+    pairs = {p: [] for p in players}
+    for r in results:
+        winner = r['green'] if r['winner'] == 1 else r['blue']
+        wins[winner] += 1
+        pairs[r['green']].append(r['blue'])
+        pairs[r['blue']].append(r['green'])
+    for _ in range(rounds):
+        for p in players:
+            games = sum(1/(strength[p] + strength[q]) for q in pairs[p]) + 1/(strength[p] + 1)
+            strength[p] = wins[p]/games
+        mean = sum(log10(s) for s in strength.values())/len(players)
+        strength = {p: s/10**mean for p, s in strength.items()}
+    return {p: 1500 + 400*log10(s) for p, s in strength.items()}
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values)-1, int(q/100*len(values)))]
+
+
+def report(results, played, elapsed):
+    print('\n{} games this run in {:.1f}s, {:.2f} games/s, {} games in total'.format(
+        played, elapsed, played/elapsed if elapsed else 0.0, len(results)))
+    if not results:
+        return
+    latency = {}
+    for r in results:
+        latency.setdefault(r['green'], []).extend(r['green_ms'])
+        latency.setdefault(r['blue'], []).extend(r['blue_ms'])
+    print('{:<16}{:>8}{:>9}{:>9}{:>9}{:>9}'.format('player', 'elo', 'p50 ms', 'p90 ms', 'p99 ms', 'max ms'))
+    for p, elo in sorted(ratings(results).items(), key=lambda x: -x[1]):
+        ms = latency[p]
+        print('{:<16}{:>8.0f}{:>9.2f}{:>9.2f}{:>9.2f}{:>9.2f}'.format(
+            p, elo, percentile(ms, 50), percentile(ms, 90), percentile(ms, 99), max(ms, default=0.0)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='headless tournament between computer players')
+    parser.add_argument('--players', nargs='+', default=['random', 'mcts:300'])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[7])
+    parser.add_argument('--games', type=int, default=10, help='games per pair of players, size and colour')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--out', default='tournament.jsonl', help='results file, one JSON line per game')
+    args = parser.parse_args()
+    for spec in args.players:
+        try:
+            makePlayer(spec)
+        except ValueError as e:
+            parser.error(str(e))
+
+    trim(args.out)
+    results = load(args.out)
+    done = {r['id'] for r in results}
+    jobs = [job for job in schedule(args.players, args.sizes, args.games) if job['id'] not in done]
+    print('{} games to play, {} already in {}'.format(len(jobs), len(done), args.out))
+
+    played = 0
+    start = time.perf_counter()
+    pool = ProcessPoolExecutor(args.workers)
+    try:
+        with open(args.out, 'a') as out:
+            for future in as_completed([pool.submit(playGame, job) for job in jobs]):
+                result = future.result()
+                out.write(json.dumps(result) + '\n')
+                out.flush()
+                results.append(result)
+                played += 1
+                if played % 10 == 0:
+                    print('{}/{} games'.format(played, len(jobs)), file=sys.stderr)
+    except KeyboardInterrupt:
+        print('interrupted, run the same command again to resume', file=sys.stderr)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    report(results, played, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main()
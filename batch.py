@@ -0,0 +1,132 @@
+'''Win detection and evaluation of many positions at once with NumPy
+
+Boards are (N, size, size) integer arrays with the values of engine.Board.cells:
+0 is empty, 1 is green (joins the top and the bottom), 2 is blue (joins the left and the right).
+Work is done in chunks so the results and the temporary arrays stay within a memory budget.
+'''
+import numpy as np
+from engine import MOVES
+
+# bytes the results and the temporary arrays of one chunk may take
+MEMORY = 64*2**20
+# bytes a cell takes at the peak of winners and of distances, as measured with tracemalloc and
+# rounded up: a byte for each of five bool arrays, four for each of four int32 arrays and a bool
+# one, and the bytes a board takes besides its cells (its index while it is worked on, the results of its chunk)
+WINNERS_CELL = 6
+DISTANCES_CELL = 18
+BOARD = 64
+INF = np.iinfo(np.int32).max//2
+
+
+def fromBoards(boards):
+    '''stacks engine.Board objects into an (N, size, size) array'''
+    size = boards[0].size
+    data = b''.join(bytes(b.cells) for b in boards)
+    return np.frombuffer(data, dtype=np.uint8).reshape(len(boards), size, size)
+
+
+def chunks(boards, per_board, kept=0):
+    '''splits the boards so that a chunk needs no more than what is left of MEMORY after the kept
+    bytes of the results, at per_board bytes a board'''
+    step = max(1, (MEMORY - kept)//max(1, per_board))
+    for start in range(0, len(boards), step):
+        yield start, boards[start:start+step]
+
+
+def slices(dr, dc, n):
+    '''the destination and source slices that move every cell to its neighbour at (dr, dc)'''
+    dst = (slice(None), slice(max(dr, 0), n + min(dr, 0)), slice(max(dc, 0), n + min(dc, 0)))
+    src = (slice(None), slice(max(-dr, 0), n + min(-dr, 0)), slice(max(-dc, 0), n + min(-dc, 0)))
+    return dst, src
+
+
+def connected(boards, player):
+    '''returns for every board whether player joins their sides, by flood filling
+    from the starting side over the player's stones until nothing changes'''
+    n = boards.shape[1]
+    own = boards == player
+    reached = np.zeros_like(own)
+    if player == 1:
+        reached[:, 0, :] = own[:, 0, :]
+    else:
+        reached[:, :, 0] = own[:, :, 0]
+    moves = [slices(dr, dc, n) for dr, dc in MOVES]
+    # only the boards whose fill is still growing are worked on, gathered into buffers made once
+    active = np.arange(len(boards))
+    buffers = [np.empty_like(own) for _ in range(3)]
+    while len(active):
+        cur, grown, mask = (b[:len(active)] for b in buffers)
+        np.take(reached, active, axis=0, out=cur, mode='clip')
+        np.copyto(grown, cur)
+        for dst, src in moves:
+            grown[dst] |= cur[src]
+        np.take(own, active, axis=0, out=mask, mode='clip')
+        grown &= mask
+        changed = np.not_equal(grown, cur, out=mask).reshape(len(active), -1).any(1)
+        reached[active] = grown
+        active = active[changed]
+    if player == 1:
+        return reached[:, n-1, :].any(1)
+    return reached[:, :, n-1].any(1)
+
+
+def winners(boards):
+    '''returns 1, 2 or 0 for every board, with the same precedence as Game.checkWin'''
+    boards = np.asarray(boards)
+    out = np.zeros(len(boards), dtype=np.int8)
+    n = boards.shape[1]
+    for start, part in chunks(boards, WINNERS_CELL*n*n + BOARD, out.nbytes):
+        blue = connected(part, 2)
+        green = connected(part, 1)
+        out[start:start+len(part)] = np.where(blue, 2, np.where(green, 1, 0))
+    return out
+
+
+def distance(boards, player):
+    '''the fewest empty cells player still has to fill to join their sides, INF if the other
+    player has already cut them off; own stones cost nothing and the other player's stones block'''
+    n = boards.shape[1]
+    cost = np.full(boards.shape, INF, dtype=np.int32)
+    cost[boards == 0] = 1
+    cost[boards == player] = 0
+    dist = np.full(boards.shape, INF, dtype=np.int32)
+    if player == 1:
+        dist[:, 0, :] = cost[:, 0, :]
+    else:
+        dist[:, :, 0] = cost[:, :, 0]
+    moves = [slices(dr, dc, n) for dr, dc in MOVES]
+    # the relaxation goes back and forth between two arrays, the steps are added up in a third
+    best = np.empty_like(dist)
+    step = np.empty_like(dist)
+    while True:
+        np.copyto(best, dist)
+        for dst, src in moves:
+            np.add(dist[src], cost[dst], out=step[dst])
+            np.minimum(best[dst], step[dst], out=best[dst])
+        if np.array_equal(best, dist):
+            break
+        dist, best = best, dist
+    if player == 1:
+        return dist[:, n-1, :].min(1)
+    return dist[:, :, n-1].min(1)
+
+
+def distances(boards):
+    '''returns an (N, 2) array with the shortest path distance of green and of blue'''
+    boards = np.asarray(boards)
+    n = boards.shape[1]
+    out = np.zeros((len(boards), 2), dtype=np.int32)
+    for start, part in chunks(boards, DISTANCES_CELL*n*n + BOARD, out.nbytes):
+        out[start:start+len(part), 0] = distance(part, 1)
+        out[start:start+len(part), 1] = distance(part, 2)
+    return out
+
+
+def evaluate(boards):
+    '''blue's distance minus green's, positive values favour green; a player who is cut off
+    counts as n*n cells away so the score stays finite'''
+    boards = np.asarray(boards)
+    n = boards.shape[1]
+    d = distances(boards)
+    np.minimum(d, n*n, out=d)
+    return d[:, 1] - d[:, 0]
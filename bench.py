@@ -0,0 +1,191 @@
+'''Benchmarks of the game's hot paths over a range of board sizes
+
+    python bench.py --out results.json
+    python bench.py --out new.json --compare results.json
+
+Runs without a window through SDL's dummy drivers, so it works on a headless box.
+'''
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+import json
+import time
+import random
+import platform
+import argparse
+import tracemalloc
+from itertools import count
+import subprocess
+from os import path
+from funcs import *
+from Game import *
+
+SIZES = list(range(MIN_BOARD_SIZE, MAX_BOARD_SIZE + 1, 3)) + [30, 50]
+
+
+def measure(fn, min_time):
+    '''calls fn until min_time seconds have passed, returns calls per second'''
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+    return calls/elapsed
+
+
+def garbage(fn, calls=20):
+    '''the most memory the temporary objects of a call to fn take, in bytes, measured with tracemalloc'''
+    fn()
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        for _ in range(calls):
+            fn()
+        return max(0, tracemalloc.get_traced_memory()[1] - start)
+    finally:
+        tracemalloc.stop()
+
+
+def headlessGame(size):
+    '''a game on the dummy display, without sound'''
+    game = Game(size)
+    game.sound_state = False
+    return game
+
+
+def randomBoard(game, rng, fill):
+    '''fills a part of the board with alternating stones, stopping before anyone wins'''
+    game.reset()
+    cells = list(range(game.size*game.size))
+    rng.shuffle(cells)
+    for i in cells[:int(fill*len(cells))]:
+        game.board.play(i)
+        if game.board.winner():
+            game.board.undo()
+            break
+
+
+def grid(game):
+    '''the board as the list of lists DFS works on'''
+    return [[game.board.get(r, c) for c in range(game.size)] for r in range(game.size)]
+
+
+def positions(rng, n):
+    return [(rng.randint(0, W-1), rng.randint(0, H-1)) for _ in range(n)]
+
+
+def benchSize(size, min_time, seed):
+    rng = random.Random(seed)
+    game = headlessGame(size)
+    points = positions(rng, 1024)
+    results = {}
+
+    def run(name, fn):
+        ops = measure(fn, min_time)
+        results[name] = {'ops': ops, 'ms': 1000/ops, 'garbage': garbage(fn)}
+
+    # inHex against a single hexagon in the middle of the board
+    x, y = game.coords(size//2, size//2)
+    it = count()
+    run('inHex', lambda: inHex(points[next(it) % 1024], x, y, game.tile_size))
+
+    # DFS from every edge stone, the way checkWin used to do it
+    randomBoard(game, rng, 0.5)
+    state = grid(game)
+    def dfs():
+        for r in range(size):
+            if state[r][0] == 2:
+                DFS((r, 0), state, lambda r, c: c == size-1, 2)
+        for c in range(size):
+            if state[0][c] == 1:
+                DFS((0, c), state, lambda r, c: r == size-1, 1)
+    run('DFS', dfs)
+    run('checkWin', game.checkWin)
+
+    # clicks at random places, starting over once the game is decided
+    def tick():
+        if game.checkWin() or not game.board.legalMoves():
+            game.reset()
+        game.tick(points[next(it) % 1024])
+    run('tick', tick)
+
+    run('highlight', lambda: game.highlight(points[next(it) % 1024]))
+
+    randomBoard(game, rng, 0.5)
+    game.showGrid()
+    run('showGrid', game.showGrid)
+
+    def frame():
+        game.highlight(points[next(it) % 1024])
+        game.showGrid()
+        game.update()
+    run('frame', frame)
+
+    run('textOut', lambda: textOut(game.screen, 'Settings', 100, ORANGE, (W/2, H/4)))
+
+    # the buttons of the start screen, checked against the mouse every frame
+    buttons = [Button((W/2, 2*H/3), 80, 'Play'), Button((150, H-75), 50, 'Settings'),
+               Button((W-100, H-75), 50, 'Rules')]
+    def highlighted():
+        for button in buttons:
+            button.highlighted()
+    run('buttons', highlighted)
+    def triggered():
+        for button in buttons:
+            button.triggered()
+    run('triggered', triggered)
+    return results
+
+
+def revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=path.dirname(path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(new, old, threshold):
+    '''prints the speed of every benchmark relative to an older run'''
+    print('\ncompared with {}:'.format(old.get('revision')))
+    for size, benches in new['results'].items():
+        for name, result in benches.items():
+            before = old['results'].get(size, {}).get(name)
+            if before:
+                ratio = result['ops']/before['ops']
+                mark = '  <-- slower' if ratio < 1 - threshold else ''
+                print('{:>4} {:<10} {:>7.2f}x{}'.format(size, name, ratio, mark))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmarks of the hot paths of the game')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--time', type=float, default=0.2, help='seconds per benchmark')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--out', help='file to save the results to as JSON')
+    parser.add_argument('--compare', help='JSON results of an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.1, help='slowdown to flag')
+    args = parser.parse_args()
+
+    report = {'revision': revision(), 'python': platform.python_version(),
+              'pygame': pg.version.ver, 'machine': platform.machine(), 'results': {}}
+    for size in args.sizes:
+        results = benchSize(size, args.time, args.seed)
+        report['results'][str(size)] = results
+        print('{}x{}'.format(size, size))
+        for name, result in results.items():
+            print('    {:<10} {:>12.0f} ops/s {:>10.3f} ms {:>10} B'.format(name, result['ops'], result['ms'],
+                                                                      result['garbage']))
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f), args.threshold)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+'''An opening book: the move to play in known positions, looked up by binary search through mmap
+
+A position and its 180 degree rotation are the same position in Hex (green still joins the top
+and the bottom, blue the left and the right), so the book keys a position by the smaller of the
+two Zobrist hashes and stores the move as seen from that orientation.
+
+The file is a magic string followed by fixed size records sorted by key:
+64 bit key, board size, 16 bit cell index (row*size + column) and the number of games or
+playouts behind the move. Nothing is read until the first lookup, and a lookup touches a
+handful of pages.
+
+    python book.py build records/book.hexb --sizes 11 --depth 3 --width 3 --time 2
+    python book.py build records/book.hexb --games records/games.hexa --depth 6
+    python book.py show records/book.hexb
+'''
+import os
+import mmap
+import struct
+from engine import Board
+
+MAGIC = b'HEXB\x01'
+RECORD = struct.Struct('<QBHI')
+# moves the archived games have to agree on before they go into the book
+MIN_GAMES = 3
+
+
+def rotate(size, i):
+    '''the cell i is moved to by turning the board half a turn'''
+    return size*size - 1 - i
+
+
+def canonical(board):
+    '''returns the key of the position and whether it is the key of the rotated board'''
+    keys = board.keys
+    last = len(board.cells) - 1
+    rotated = keys[-1] if board.move == 2 else 0
+    for i in board.history:
+        rotated ^= keys[2*(last - i) + board.cells[i] - 1]
+    if rotated < board.hash:
+        return rotated, True
+    return board.hash, False
+
+
+class Book:
+    '''the book file, mapped on the first lookup'''
+    def __init__(self, filename):
+        self.filename = filename
+        self.data = None
+        # records in the file, None until it has been opened
+        self.count = None
+
+    def open(self):
+        '''maps the file, returns False if there is no book'''
+        if self.count is not None:
+            return self.data is not None
+        self.count = 0
+        if not os.path.exists(self.filename) or os.path.getsize(self.filename) <= len(MAGIC):
+            return False
+        with open(self.filename, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError('{} is not an opening book'.format(self.filename))
+        self.count = (len(self.data) - len(MAGIC))//RECORD.size
+        return True
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+        self.data = self.count = None
+
+    def __len__(self):
+        self.open()
+        return self.count
+
+    def record(self, k):
+        return RECORD.unpack_from(self.data, len(MAGIC) + k*RECORD.size)
+
+    def __iter__(self):
+        '''yields (key, size, move, count) in key order'''
+        self.open()
+        for k in range(self.count):
+            yield self.record(k)
+
+    def find(self, key, size):
+        '''returns (move, count) stored for a key, None if the book does not know it'''
+        if not self.open():
+            return None
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi)//2
+            if self.record(mid)[:2] < (key, size):
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count:
+            found, found_size, move, count = self.record(lo)
+            if (found, found_size) == (key, size):
+                return move, count
+        return None
+
+    def lookup(self, board):
+        '''returns the book move for the position on board, None if there is none'''
+        key, rotated = canonical(board)
+        entry = self.find(key, board.size)
+        if entry is None:
+            return None
+        move = rotate(board.size, entry[0]) if rotated else entry[0]
+        # a hash collision could name a taken cell
+        if move >= len(board.cells) or board.cells[move]:
+            return None
+        return move
+
+
+def write(filename, entries):
+    '''writes {(key, size): (move, count)} as a book, the old file is replaced at once'''
+    folder = os.path.dirname(filename)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    temp = filename + '.tmp'
+    with open(temp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(b''.join(RECORD.pack(key, size, move, min(count, 0xffffffff))
+                         for (key, size), (move, count) in sorted(entries.items())))
+    os.replace(temp, filename)
+
+
+def add(entries, board, move, count):
+    '''puts the move for the position on board into entries, in the orientation of its key'''
+    key, rotated = canonical(board)
+    entries[key, board.size] = (rotate(board.size, move) if rotated else move, count)
+
+
+def fromSearch(size, depth, width, ai, entries):
+    '''searches every position of the opening tree: the best move goes into the book and the
+    width most visited moves are followed, down to depth moves from the empty board'''
+    frontier = [Board(size)]
+    seen = set()
+    for ply in range(depth):
+        following = []
+        for board in frontier:
+            key = canonical(board)[0]
+            if key in seen:
+                # the same position in another move order or turned around
+                continue
+            seen.add(key)
+            visits = ai.visits(board)
+            ranked = sorted(visits, key=visits.get, reverse=True)
+            if not ranked:
+                continue
+            add(entries, board, ranked[0], visits[ranked[0]])
+            for move in ranked[:width]:
+                child = board.copy()
+                child.play(move)
+                following.append(child)
+        print('{}x{} move {}: {} positions searched'.format(size, size, ply + 1, len(seen)))
+        frontier = following
+    return entries
+
+
+def fromGames(archive, depth, entries):
+    '''takes the move that won most often in every position of the first depth moves of the games'''
+    stats = {}
+    for game in archive:
+        board = Board(game.size)
+        for move in game.moves[:depth]:
+            key, rotated = canonical(board)
+            played = stats.setdefault((key, game.size), {})
+            seen = rotate(game.size, move) if rotated else move
+            wins, games = played.get(seen, (0, 0))
+            played[seen] = (wins + (game.winner == board.move), games + 1)
+            board.play(move)
+    for position, played in stats.items():
+        move, (wins, games) = max(played.items(), key=lambda m: (m[1][0]/m[1][1], m[1][1]))
+        if games >= MIN_GAMES and wins:
+            entries[position] = (move, games)
+    return entries
+
+
+if __name__ == '__main__':
+    import argparse
+    from record import Archive, cellName
+    from mcts import ParallelMCTS
+    parser = argparse.ArgumentParser(description='builds and lists opening books')
+    parser.add_argument('mode', choices=['build', 'show'])
+    parser.add_argument('book')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[11], help='board sizes to search')
+    parser.add_argument('--depth', type=int, default=3, help='moves from the empty board')
+    parser.add_argument('--width', type=int, default=3, help='moves followed from every position')
+    parser.add_argument('--time', type=float, default=1.0, help='seconds of search per position')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--games', help='build from an archive of games instead of searching')
+    args = parser.parse_args()
+    book = Book(args.book)
+    if args.mode == 'build':
+        # the positions of an older book are kept unless they are worked out again
+        entries = {(key, size): (move, count) for key, size, move, count in book}
+        book.close()
+        if args.games:
+            with Archive(args.games) as archive:
+                fromGames(archive, args.depth, entries)
+        else:
+            ai = ParallelMCTS(args.workers, args.time)
+            for size in args.sizes:
+                fromSearch(size, args.depth, args.width, ai, entries)
+            ai.stop()
+        write(args.book, entries)
+        print('{} positions in {}'.format(len(entries), args.book))
+    else:
+        for key, size, move, count in book:
+            print('{:016x} {}x{} {:>4} {:>8}'.format(key, size, size, cellName(size, move), count))
+        book.close()
@@ -1,4 +1,5 @@
 import pygame as pg
+from os import path
 from funcs import Point
 
 # constants
@@ -13,12 +14,41 @@ WHITE = (255, 255, 255)
 YELLOW = (255, 255, 0)
 LIGHTYELLOW = (255, 255, 51)
 ORANGE = (255, 128, 0)
+GRAY = (128, 128, 128)
 EPS = 0.0000000001
 FPS = 30
 MAX_BOARD_SIZE = 20
 MIN_BOARD_SIZE = 5
+# bigger boards are shown through a camera that pans and zooms
+MAX_LARGE_BOARD_SIZE = 200
+LARGE_BOARD_STEP = 10
+MAX_TILE = 40
+# below this tile size cells are drawn as scaled pixels without outlines
+DETAIL_TILE = 6
+ZOOM_STEP = 1.25
+PAN_STEP = 50
+PAN_KEYS = {pg.K_LEFT: (PAN_STEP, 0), pg.K_RIGHT: (-PAN_STEP, 0),
+            pg.K_UP: (0, PAN_STEP), pg.K_DOWN: (0, -PAN_STEP)}
+# the computer plays blue and thinks this many seconds per move
+AI_PLAYER = 2
+AI_TIME = 1.0
+# worker processes for the search, None uses every core
+AI_WORKERS = None
+# posted when the computer has found its move
+AI_DONE = pg.USEREVENT + 1
+# ms the loop waits for events while things change without them (moves over the network, the profiler overlay)
+POLL_TIME = 1000//FPS
+# posted when the heat map of heatmap.py has a new snapshot
+HEATMAP_DONE = pg.USEREVENT + 2
+# shades of the heat map, a cell is drawn again when its value moves to another one
+HEAT_LEVELS = 16
+# posted when H-search has analysed the position for the hints
+HINTS_DONE = pg.USEREVENT + 3
 
 # setup()
+# assets are looked up next to the code, so the game starts from any working directory
+IMG_FOLDER = path.join(path.dirname(path.abspath(__file__)), 'img')
+DOC_FOLDER = path.join(path.dirname(path.abspath(__file__)), 'docs')
 TILE_IMG = 'tile.png'
 BG_IMG = 'bg.jpg'
 PAUSE_IMG = 'pause.png'
@@ -26,11 +56,36 @@ BACK_IMG = 'back.png'
 UP_IMG = 'up-arrow.png'
 DOWN_IMG = 'down-arrow.png'
 RULES = 'rules.txt'
+# optional, the game runs silently without it
 BACKGROUND_MUSIC = 'bg-music.wav'
 CLICK_SOUND = 'click.wav'
+# finished games are appended to this archive, see record.py
+ARCHIVE = path.join('records', 'games.hexa')
+# the computer plays the moves of this opening book while it knows the position, see book.py
+BOOK = path.join('records', 'book.hexb')
+# frame timings kept by profiler.py, frames averaged on the overlay and redrawn after,
+# frames profiled by cProfile on F5 and where the exports go
+PROFILE_FRAMES = 600
+PROFILE_AVERAGE = 60
+PROFILE_REFRESH = 15
+PROFILE_CAPTURE = 300
+PROFILE_FOLDER = 'profiles'
 # size of the window
 W = 600
 H = 600
+# the move history right of the board, clear of the sides of a 5x5 one: its centre top, rows and text size
+HISTORY_POS = (W-50, 25)
+HISTORY_WIDTH = 96
+HISTORY_ROWS = 12
+HISTORY_ROW = 22
+HISTORY_TEXT = 20
+# H-search hints, worked out in a thread on boards up to this size, the proved winner is written at the bottom right
+HINT_SIZE = 13
+HINT_POS = (W-50, H-20)
+HINT_TEXT = 26
+# the status line of online games, starting at the bottom left below the board
+STATUS_POS = (10, H-15)
+STATUS_TEXT = 18
 # size of the grid
 SIZE = 11
 moves = [Point(1, 0), Point(1, -1), Point(0, 1), Point(0, -1), Point(-1, 1), Point(-1, 0)]
@@ -0,0 +1,204 @@
+'''Hex rules without pygame: a flat board, neighbour tables and win detection'''
+import random
+from array import array
+
+# neighbour offsets as (row, column), in the same order as consts.moves
+MOVES = ((1, 0), (1, -1), (0, 1), (0, -1), (-1, 1), (-1, 0))
+
+# neighbour and side tables, keyed by board size
+tables = {}
+
+def neighbours(size):
+    '''returns the neighbours of every cell and the sides each cell touches for both players'''
+    if size not in tables:
+        top, bottom, left, right = range(size*size, size*size + 4)
+        adjacent = []
+        sides = []
+        for r in range(size):
+            for c in range(size):
+                adjacent.append(tuple((r+dr)*size + c+dc for dr, dc in MOVES
+                                      if 0 <= r+dr < size and 0 <= c+dc < size))
+                # green joins the top and the bottom, blue joins the left and the right
+                green = (top,)*(r == 0) + (bottom,)*(r == size-1)
+                blue = (left,)*(c == 0) + (right,)*(c == size-1)
+                sides.append((None, green, blue))
+        tables[size] = (tuple(adjacent), tuple(sides))
+    return tables[size]
+
+# Zobrist keys, keyed by board size
+zobrist = {}
+
+def hashKeys(size):
+    '''returns a 64 bit key for every (cell, player) pair followed by the key for blue to move,
+    seeded by the size so every process hashes a position the same way'''
+    if size not in zobrist:
+        rng = random.Random(size)
+        zobrist[size] = array('Q', (rng.getrandbits(64) for _ in range(2*size*size + 1)))
+    return zobrist[size]
+
+def filledWinner(size, cells):
+    '''returns the winner of a completely filled board with a single flood fill from the top'''
+    adjacent = neighbours(size)[0]
+    last = size*size - size
+    seen = bytearray(size*size)
+    stack = [i for i in range(size) if cells[i] == 1]
+    for i in stack:
+        seen[i] = 1
+    while stack:
+        i = stack.pop()
+        if i >= last:
+            return 1
+        for j in adjacent[i]:
+            if cells[j] == 1 and not seen[j]:
+                seen[j] = 1
+                stack.append(j)
+    return 2
+
+
+class DisjointSet:
+    '''union-find over cells with union by size; there is no path compression, so a union changes
+    a single parent, the unions are logged and the latest ones can be rolled back'''
+    def __init__(self, n):
+        self.parent = list(range(n))
+        self.weight = [1]*n
+        # the roots that were put under another root, in order
+        self.log = array('i')
+
+    def find(self, v):
+        # union by size keeps the trees at most log2(n) deep
+        parent = self.parent
+        while parent[v] != v:
+            v = parent[v]
+        return v
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.weight[a] < self.weight[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.weight[a] += self.weight[b]
+        self.log.append(b)
+
+    def rollback(self, mark):
+        '''takes back the unions made since the log was mark entries long'''
+        parent, weight, log = self.parent, self.weight, self.log
+        while len(log) > mark:
+            b = log.pop()
+            weight[parent[b]] -= weight[b]
+            parent[b] = b
+
+    def connected(self, a, b):
+        return self.find(a) == self.find(b)
+
+    def copy(self):
+        other = DisjointSet(0)
+        other.parent = self.parent[:]
+        other.weight = self.weight[:]
+        other.log = array('i', self.log)
+        return other
+
+
+class Board:
+    '''a Hex position: cells are stored row by row, 0 is empty, 1 is green and 2 is blue'''
+    def __init__(self, size):
+        self.size = size
+        self.cells = bytearray(size*size)
+        self.adjacent, self.sides = neighbours(size)
+        self.top, self.bottom, self.left, self.right = range(size*size, size*size + 4)
+        self.dsu = DisjointSet(size*size + 4)
+        self.history = array('i')
+        # the length of the union log before every move, to roll it back to
+        self.marks = array('i')
+        # moves that were taken back, the next one to redo last
+        self.future = array('i')
+        self.move = 1
+        self.keys = hashKeys(size)
+        self.hash = 0
+
+    def copy(self):
+        other = Board.__new__(Board)
+        other.__dict__.update(self.__dict__)
+        other.cells = bytearray(self.cells)
+        other.dsu = self.dsu.copy()
+        other.history = array('i', self.history)
+        other.marks = array('i', self.marks)
+        other.future = array('i', self.future)
+        return other
+
+    def index(self, r, c):
+        return r*self.size + c
+
+    def coords(self, i):
+        return divmod(i, self.size)
+
+    def get(self, r, c):
+        return self.cells[r*self.size + c]
+
+    def connect(self, i):
+        '''joins the stone on a cell with its neighbours of the same colour and the sides it touches'''
+        player = self.cells[i]
+        cells = self.cells
+        union = self.dsu.union
+        for j in self.adjacent[i]:
+            if cells[j] == player:
+                union(i, j)
+        for side in self.sides[i][player]:
+            union(i, side)
+
+    def play(self, i):
+        '''places a stone of the player to move on an empty cell, any move but the next one
+        to redo drops the moves that were taken back'''
+        if self.cells[i]:
+            raise ValueError('cell {} is already taken'.format(i))
+        self.cells[i] = self.move
+        self.marks.append(len(self.dsu.log))
+        self.connect(i)
+        self.history.append(i)
+        self.hash ^= self.keys[2*i + self.move - 1] ^ self.keys[-1]
+        self.move = 3 - self.move
+        if self.future:
+            if self.future[-1] == i:
+                self.future.pop()
+            else:
+                del self.future[:]
+
+    def undo(self):
+        '''takes back the last move by rolling back the unions it made, returns its cell'''
+        i = self.history.pop()
+        self.cells[i] = 0
+        self.move = 3 - self.move
+        self.hash ^= self.keys[2*i + self.move - 1] ^ self.keys[-1]
+        self.dsu.rollback(self.marks.pop())
+        self.future.append(i)
+        return i
+
+    def redo(self):
+        '''plays the last move that was taken back again, returns its cell'''
+        i = self.future[-1]
+        self.play(i)
+        return i
+
+    def seek(self, n):
+        '''undoes or redoes moves until n of them have been played, returns the cells that changed'''
+        changed = []
+        while len(self.history) > n:
+            changed.append(self.undo())
+        while len(self.history) < n and self.future:
+            changed.append(self.redo())
+        return changed
+
+    def legalMoves(self):
+        '''returns the empty cells, or nothing if the game is over'''
+        if self.winner():
+            return []
+        return [i for i, v in enumerate(self.cells) if not v]
+
+    def winner(self):
+        '''returns the player who has joined their sides, 0 if nobody has'''
+        if self.dsu.connected(self.left, self.right):
+            return 2
+        if self.dsu.connected(self.top, self.bottom):
+            return 1
+        return 0
@@ -1,15 +1,26 @@
 import pygame as pg
-from math import sqrt, hypot
-from collections import deque
+from os import path
+from math import sqrt, hypot, ceil
+from array import array
+from functools import lru_cache
 
 class Point:
-    def __init__(self, *pos):
-        if len(pos) == 1:
-            self.x, self.y = pos[0]
-            self.X, self.Y = list(map(int, pos[0]))
-        else:
-            self.x, self.y = pos
-            self.X, self.Y = list(map(int, pos))
+    '''a point of the screen for UI code, the board works on flat cell indices'''
+    __slots__ = ('x', 'y')
+
+    def __init__(self, x, y=None):
+        if y is None:
+            x, y = x
+        self.x = x
+        self.y = y
+
+    @property
+    def X(self):
+        return int(self.x)
+
+    @property
+    def Y(self):
+        return int(self.y)
 
     def dist(self, other):
         return hypot(self.x - other.x, self.y - other.y)
@@ -27,85 +38,180 @@ class Point:
 
 from consts import *
 
-def triangleS(A, B, C):
-    '''retrun the surface of a triangle'''
-    a = C.dist(B)
-    b = A.dist(C)
-    c = A.dist(B)
-    p = (a+b+c)/2
-    return sqrt(p*(p-a)*(p-b)*(p-c))
-
 def inHex(pos, x, y, a):
-    '''checks if a point is in a hexagon'''
-    P = Point(pos)
-    points = [(x+a, y), (x+a/2, y+a*sqrt(3)/2),
-              (x-a/2, y+a*sqrt(3)/2), (x-a, y),
-              (x-a/2, y-a*sqrt(3)/2), (x+a/2, y-a*sqrt(3)/2)]
-    points = list(map(Point, points))
+    '''checks if a point is in a hexagon: the triangles between the point and the sides
+    add up to the hexagon only from the inside'''
+    px, py = pos[0] - x, pos[1] - y
+    corners = hexagon(a)
     sum = 0
-    for i in range(-1, 5):
-        sum += triangleS(points[i], points[i+1], P)
+    ax, ay = corners[-1]
+    for bx, by in corners:
+        sum += abs((ax-px)*(by-py) - (bx-px)*(ay-py))/2
+        ax, ay = bx, by
     S = a*a*3*sqrt(3)/2
-    return abs(S-sum) < EPS
+    return abs(S-sum) < EPS*max(1, S)
+
+def hexRound(q, r):
+    '''rounds fractional axial coordinates to the nearest hexagon'''
+    s = -q-r
+    rq, rr, rs = round(q), round(r), round(s)
+    dq, dr, ds = abs(rq-q), abs(rr-r), abs(rs-s)
+    if dq > dr and dq > ds:
+        rq = -rr-rs
+    elif dr > ds:
+        rr = -rq-rs
+    return rq, rr
 
 def inRect(pos, x, y, w, h):
-    '''checks if a point is in a rectangle'''
-    return (pos.x > x and pos.x < x + w and\
-           pos.y > y and pos.y < y + h)
-
-def drawHex(surface, colIn, colOut, pos, a):
-    x, y = pos
-    points = [(x-a/2, y-a*sqrt(3)/2),
-              (x+a/2, y-a*sqrt(3)/2),
-              (x+a, y),
-              (x+a/2, y+a*sqrt(3)/2),
-              (x-a/2, y+a*sqrt(3)/2),
-              (x-a, y)]
+    '''checks if a point, a Point or an (x, y) pair, is in a rectangle'''
+    px, py = pos
+    return (px > x and px < x + w and\
+           py > y and py < y + h)
+
+@lru_cache(maxsize=64)
+def hexagon(a):
+    '''the vertices of a hexagon with side a around its centre, clockwise from the top left'''
+    h = a*sqrt(3)/2
+    return ((-a/2, -h), (a/2, -h), (a, 0), (a/2, h), (-a/2, h), (-a, 0))
+
+def blend(a, b, t):
+    '''the colour t of the way from a to b'''
+    return tuple(int(x + (y-x)*t) for x, y in zip(a, b))
+
+def drawPolygon(surface, colIn, colOut, points, width=4):
     pg.draw.polygon(surface, colIn, points)
-    pg.draw.polygon(surface, colOut, points, 4)
+    pg.draw.polygon(surface, colOut, points, width)
 
-def inBounds(v, w, h):
-    return (v.X >= 0 and v.X < h and\
-            v.Y >= 0 and v.Y < w)
+def drawHex(surface, colIn, colOut, pos, a, width=4):
+    x, y = pos
+    drawPolygon(surface, colIn, colOut, [(x+dx, y+dy) for dx, dy in hexagon(a)], width)
+
+class Geometry:
+    '''where the cells of a board with tiles of side a are, relative to the centre of the top left cell:
+    centres of every cell in flat arrays, the vertices and the bounding box every hexagon has around
+    its centre and the coloured sides of the board. Panning only moves the origin these are added to,
+    so the tables are rebuilt when the board size or the tile size changes'''
+    def __init__(self, size, a, width):
+        self.size = size
+        self.a = a
+        self.xs = array('d', [c*3/2*a for r in range(size) for c in range(size)])
+        self.ys = array('d', [(c+2*r)*a*sqrt(3)/2 for r in range(size) for c in range(size)])
+        self.hexagon = hexagon(a)
+        # the box of a hexagon and its outline around the centre, rounded outwards
+        pad = width//2
+        self.box = (-ceil(a)-pad, -ceil(a*sqrt(3)/2)-pad, 2*ceil(a)+2*pad+1, 2*ceil(a*sqrt(3)/2)+2*pad+1)
+        # for picking: axial coordinates are the offsets scaled by these
+        self.kx = 1/(3/2*a)
+        self.ky = 1/(a*sqrt(3))
+        # the triangles that mark the sides of each player
+        h = a*sqrt(3)
+        A = (-a, -h)
+        B = (a/2*(3*size-1), h/2*(size-2) + h/6)
+        C = (a/2*(3*size-1), h/2*(3*size-1))
+        D = (-a, h*(size-1/2) - h/6)
+        M = ((A[0]+B[0])/2, (B[1]+C[1])/2)
+        self.sides = ((GREEN, (A, B, M)), (GREEN, (C, D, M)), (BLUE, (B, C, M)), (BLUE, (D, A, M)))
+        # left, top, right and bottom of the board, its sides included
+        self.extent = (A[0], A[1], C[0], C[1])
+
+@lru_cache(maxsize=8)
+def geometry(size, a, width):
+    return Geometry(size, a, width)
+
+@lru_cache(maxsize=64)
+def hexSprite(colIn, colOut, a, width=4):
+    '''returns a hexagon drawn once on a transparent surface, centred in it'''
+    pad = width//2 + 1
+    surface = pg.Surface((int(2*(a+pad))+1, int(a*sqrt(3)+2*pad)+1), pg.SRCALPHA)
+    drawHex(surface, colIn, colOut, surface.get_rect().center, a, width)
+    return surface
+
+@lru_cache(maxsize=16)
+def gridNeighbours(h, w):
+    '''the flat indices r*w + c of the neighbours of every cell of an h by w grid, in the order of moves'''
+    return tuple(tuple((r+m.X)*w + c+m.Y for m in moves if 0 <= r+m.X < h and 0 <= c+m.Y < w)
+                 for r in range(h) for c in range(w))
 
 def DFS(start, grid, exit, player):
+    '''checks if a chain of player's stones leads from start, a (row, column) pair, to a cell
+    where exit(row, column) is true, walking flat indices so no objects are made per step'''
     w = len(grid[0])
     h = len(grid)
-    Q = deque()
-    Q.append(start)
-    used = [[False for _ in range(w)] for __ in range(h)]
-    while len(Q):
+    adjacent = gridNeighbours(h, w)
+    cells = bytes(v for row in grid for v in row)
+    r, c = start
+    Q = [int(r)*w + int(c)]
+    used = bytearray(w*h)
+    while Q:
         cur = Q[-1]
-        if exit(cur):
+        if exit(*divmod(cur, w)):
             return True
-        used[cur.X][cur.Y] = True
-        flag = False
-        for m in moves:
-            other = cur + m
-            if (inBounds(other, w, h) and not used[other.X][other.Y])\
-                and grid[other.X][other.Y] == player:
+        used[cur] = 1
+        for other in adjacent[cur]:
+            if not used[other] and cells[other] == player:
                 Q.append(other)
-                flag = True
                 break
-        if not flag:
+        else:
             Q.pop()
     return False
 
+@lru_cache(maxsize=16)
+def getFont(size):
+    '''returns the font of a given size, the system lookup is done once per size'''
+    return pg.font.SysFont('Verdana', size)
+
+@lru_cache(maxsize=256)
+def renderText(txt, size, col):
+    '''returns a rendered line of text, shared by all calls with the same arguments'''
+    return getFont(size).render(txt, False, col)
+
+def textCacheInfo():
+    '''returns hits and misses of the font and text caches'''
+    return {'fonts': getFont.cache_info(), 'texts': renderText.cache_info()}
+
+@lru_cache(maxsize=None)
+def loadImage(name):
+    '''loads an image from img/ the first time it is needed, later calls share it'''
+    return pg.image.load(path.join(IMG_FOLDER, name)).convert_alpha()
+
+@lru_cache(maxsize=None)
+def loadSound(name):
+    '''loads a sound from docs/ the first time it is needed, None without the file or a sound device'''
+    if not pg.mixer.get_init():
+        return None
+    try:
+        return pg.mixer.Sound(path.join(DOC_FOLDER, name))
+    except (pg.error, FileNotFoundError):
+        return None
+
+@lru_cache(maxsize=None)
+def loadText(name):
+    with open(path.join(DOC_FOLDER, name), 'r') as f:
+        return f.read()
+
+def playMusic(name, volume=0.5):
+    '''streams music from docs/ in a loop instead of decoding all of it up front,
+    returns False if there is no file or no sound device'''
+    if not pg.mixer.get_init():
+        return False
+    try:
+        pg.mixer.music.load(path.join(DOC_FOLDER, name))
+    except (pg.error, FileNotFoundError):
+        return False
+    pg.mixer.music.set_volume(volume)
+    pg.mixer.music.play(loops=-1)
+    return True
+
 def textRect(txt, size):
-    font = pg.font.SysFont('Verdana', size)
-    text = font.render(txt, False, BLACK)
-    return text.get_rect()
+    return renderText(txt, size, BLACK).get_rect()
 
 def textOut(surface, data, size, col, pos):
-    txt = str(data)
-    font = pg.font.SysFont('Verdana', size)
-    text = font.render(txt, False, col)
+    text = renderText(str(data), size, col)
     rect = text.get_rect(center=pos)
     surface.blit(text, rect)
 
 def textOutMultiline(surface, txt, size, col, pos):
-    font = pg.font.SysFont('Verdana', size)
     for y, line in enumerate(txt.split('\n')):
-        text = font.render(line, False, col)
+        text = renderText(line, size, col)
         rect = text.get_rect(center=(pos[0], pos[1]+(y+5)*size))
         surface.blit(text, rect)
@@ -0,0 +1,100 @@
+'''Win chances of the empty cells for the player to move, refined by random playouts in a thread
+
+Every playout fills the board at random from the current position. A cell's value is how often
+the player to move won the playouts in which they got that cell, so each playout rates every
+empty cell at once.
+
+The render loop never waits on the worker: the worker publishes a new Snapshot by replacing one
+attribute, soon after it starts on a position and then less often up to every REFRESH seconds,
+and the loop reads whichever snapshot is there. A new position bumps the generation, which the
+worker checks after every playout, so it drops the old position at once and starts over.
+'''
+import time
+import random
+import threading
+from collections import namedtuple
+from engine import filledWinner
+
+# playouts after which a position is left alone, and seconds between snapshots
+PLAYOUTS = 20000
+REFRESH = 0.1
+
+# values has a win rate for every empty cell that has been rated and None for the others
+Snapshot = namedtuple('Snapshot', 'generation hash playouts values')
+
+
+class Heatmap:
+    def __init__(self, notify=None):
+        # called from the worker thread after each snapshot
+        self.notify = notify
+        self.generation = 0
+        self.job = None
+        self.snapshot = None
+        self.wake = threading.Event()
+        self.thread = None
+
+    def start(self, board):
+        '''drops the position being worked on and starts on the one of board'''
+        self.generation += 1
+        self.job = (self.generation, board.hash, board.size, bytes(board.cells), board.move)
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.work, name='heatmap', daemon=True)
+            self.thread.start()
+        self.wake.set()
+
+    def stop(self):
+        '''drops the position being worked on'''
+        self.generation += 1
+        self.job = None
+
+    def current(self, board):
+        '''the latest snapshot if it is of the position of board, else None'''
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.generation == self.generation and snapshot.hash == board.hash:
+            return snapshot
+        return None
+
+    def work(self):
+        while True:
+            self.wake.wait()
+            self.wake.clear()
+            job = self.job
+            if job is not None:
+                self.refine(*job)
+
+    def refine(self, generation, hash, size, cells, player):
+        empty = [i for i, v in enumerate(cells) if not v]
+        if not empty:
+            return
+        owned = [0]*len(cells)
+        won = [0]*len(cells)
+        half = (len(empty) + 1)//2
+        done = 0
+        wait = REFRESH/5
+        publish = time.perf_counter() + wait
+        while done < PLAYOUTS and generation == self.generation:
+            # the same fill as mcts.playout, the player to move gets the first half of the shuffled cells
+            random.shuffle(empty)
+            filled = bytearray(cells)
+            mine = empty[:half]
+            for i in mine:
+                filled[i] = player
+            for i in empty[half:]:
+                filled[i] = 3 - player
+            for i in mine:
+                owned[i] += 1
+            if filledWinner(size, filled) == player:
+                for i in mine:
+                    won[i] += 1
+            done += 1
+            # lets the render loop have the interpreter without waiting out the switch interval
+            time.sleep(0)
+            if done == PLAYOUTS or time.perf_counter() >= publish:
+                values = tuple(won[i]/owned[i] if owned[i] and not cells[i] else None for i in range(len(cells)))
+                if generation != self.generation:
+                    break
+                self.snapshot = Snapshot(generation, hash, done, values)
+                if self.notify:
+                    self.notify()
+                wait = min(REFRESH, 2*wait)
+                publish = time.perf_counter() + wait
@@ -0,0 +1,239 @@
+'''Virtual connections of Hex positions found with H-search (Anshelevich)
+
+For one player the points of the board are their groups of stones (a side counts as a group)
+and the empty cells. A full connection between two points holds whatever the other player does,
+a semi connection holds if the player moves first. Each comes with a carrier: the empty cells the
+connection needs, kept as a bitset in an int. Starting from neighbouring points:
+
+    AND  x-z and z-y full with disjoint carriers: x-y is full through a group z
+         and semi through an empty cell z, its key, which joins the carrier
+    OR   semis x-y whose carriers have nothing in common: x-y is full over their union
+
+A player whose sides are fully connected has won whoever is to move, the player to move
+also wins with a semi connection between their sides by playing its key.
+
+The limits on the connections kept make the result depend on the order they are found in, so
+every position is built from scratch in an order fixed by the position alone: a group is named
+by its smallest point, whichever moves made it. Deriving a position from the one before it
+dropped connections the scratch build keeps.
+'''
+from collections import OrderedDict
+
+# connections kept per pair of points, later ones are dropped
+FULL_LIMIT = 4
+SEMI_LIMIT = 8
+# connections needing more empty cells than this are not followed
+CARRIER_LIMIT = 12
+# positions kept per player
+CACHE_SIZE = 256
+
+
+def bits(carrier):
+    '''the cells of a carrier'''
+    cells = []
+    while carrier:
+        low = carrier & -carrier
+        cells.append(low.bit_length() - 1)
+        carrier ^= low
+    return cells
+
+
+def popcount(carrier):
+    return bin(carrier).count('1')
+
+
+if hasattr(int, 'bit_count'):
+    popcount = int.bit_count
+
+
+def pair(x, y):
+    return (x, y) if x < y else (y, x)
+
+
+def labels(board):
+    '''names every point by the smallest point of its group, the sides are points after the cells'''
+    find = board.dsu.find
+    names = list(range(len(board.cells) + 4))
+    first = {}
+    for p in range(len(names)):
+        if p >= len(board.cells) or board.cells[p]:
+            names[p] = first.setdefault(find(p), p)
+    return names
+
+
+class Connections:
+    '''the full and semi connections of one player in one position'''
+    def __init__(self, board, player):
+        self.player = player
+        self.cells = bytearray(board.cells)
+        # 1 for the points that are groups of the player, the sides included
+        self.groups = bytearray(v == player for v in board.cells) + b'\x01'*4
+        self.names = labels(board)
+        first, second = (board.top, board.bottom) if player == 1 else (board.left, board.right)
+        self.ends = (self.names[first], self.names[second])
+        # carriers of the full connections and (carrier, key) of the semi ones, by pair of points
+        self.full = {}
+        self.semi = {}
+        # the points every point is fully connected to
+        self.partners = {}
+        # full connections not combined with the others yet
+        self.queue = []
+
+    def addFull(self, x, y, carrier, queue=True):
+        if x == y or popcount(carrier) > CARRIER_LIMIT:
+            return
+        key = pair(x, y)
+        known = self.full.get(key)
+        if known is None:
+            known = self.full[key] = []
+            self.partners.setdefault(x, set()).add(y)
+            self.partners.setdefault(y, set()).add(x)
+        for other in known:
+            if other & carrier == other:
+                return
+        # a smaller carrier replaces the ones that contain it
+        known[:] = [other for other in known if other & carrier != carrier]
+        if len(known) >= FULL_LIMIT:
+            return
+        known.append(carrier)
+        if queue:
+            self.queue.append((x, y, carrier))
+
+    def addSemi(self, x, y, carrier, mid):
+        if x == y or popcount(carrier) > CARRIER_LIMIT:
+            return
+        key = pair(x, y)
+        for other in self.full.get(key, ()):
+            if other & carrier == other:
+                return
+        known = self.semi.setdefault(key, [])
+        for other, _ in known:
+            if other & carrier == other:
+                return
+        known[:] = [(other, m) for other, m in known if other & carrier != carrier]
+        if len(known) >= SEMI_LIMIT:
+            return
+        # kept from the smallest carrier up
+        size = popcount(carrier)
+        at = 0
+        while at < len(known) and popcount(known[at][0]) <= size:
+            at += 1
+        known.insert(at, (carrier, mid))
+        # OR: takes the semis in order while they shrink the part they share
+        common = union = carrier
+        for other, _ in known:
+            if common & other != common:
+                common &= other
+                union |= other
+                if not common:
+                    self.addFull(x, y, union)
+                    return
+
+    def close(self):
+        '''applies the AND and OR rules until no new full connection turns up'''
+        full = self.full
+        groups = self.groups
+        while self.queue:
+            x, y, carrier = self.queue.pop()
+            if carrier not in full.get(pair(x, y), ()):
+                # replaced by a smaller carrier in the meantime
+                continue
+            for mid, end in ((x, y), (y, x)):
+                if mid in self.ends:
+                    # going through a side would join everything that touches it
+                    continue
+                through = groups[mid]
+                for other in list(self.partners.get(mid, ())):
+                    if other == end:
+                        continue
+                    for second in full.get(pair(mid, other), ()):
+                        joined = carrier | second
+                        if carrier & second:
+                            continue
+                        if (joined >> end) & 1 and not groups[end]:
+                            continue
+                        if (joined >> other) & 1 and not groups[other]:
+                            continue
+                        if through:
+                            self.addFull(end, other, joined)
+                        elif not (joined >> mid) & 1:
+                            self.addSemi(end, other, joined | (1 << mid), mid)
+
+    def build(self, board):
+        '''finds the connections of the position from scratch'''
+        self.neighbours(board, range(len(self.cells)))
+        self.close()
+        return self
+
+    def neighbours(self, board, cells):
+        '''the full connections with empty carriers between the given empty cells and their neighbours'''
+        names = self.names
+        player = self.player
+        for i in cells:
+            if self.cells[i]:
+                continue
+            for j in board.adjacent[i]:
+                if self.cells[j] == 0:
+                    self.addFull(i, j, 0)
+                elif self.cells[j] == player:
+                    self.addFull(i, names[j], 0)
+            for side in board.sides[i][player]:
+                self.addFull(i, names[side], 0)
+
+    def connected(self):
+        '''the carriers of the full connections between the player's sides'''
+        return self.full.get(pair(*self.ends), [])
+
+    def threats(self):
+        '''the semi connections between the player's sides as (carrier, key)'''
+        return self.semi.get(pair(*self.ends), [])
+
+
+class Analysis:
+    '''what the connections of both players say about a position'''
+    def __init__(self, board, green, blue):
+        self.connections = {1: green, 2: blue}
+        mover = board.move
+        other = 3 - mover
+        self.winner = board.winner()
+        # cells that win for the player to move, the keys of their semi connections
+        self.wins = []
+        # cells where the player to move has to play to stop the other one, None if they can play anywhere
+        self.mustplay = None
+        if self.winner:
+            return
+        if self.connections[other].connected():
+            self.winner = other
+        elif self.connections[mover].connected() or self.connections[mover].threats():
+            self.winner = mover
+            self.wins = sorted({mid for _, mid in self.connections[mover].threats()})
+        threats = self.connections[other].threats()
+        if threats and not self.winner:
+            # a move outside the carrier of one of the threats lets it through
+            region = ~0
+            for carrier, _ in threats:
+                region &= carrier
+            self.mustplay = bits(region & ((1 << len(board.cells)) - 1))
+
+
+class HSearch:
+    '''analyses positions for both players, keeping the results by position hash so every
+    position is worked out once'''
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.cache = OrderedDict()
+
+    def connections(self, board, player):
+        key = (board.size, board.hash, player)
+        result = self.cache.get(key)
+        if result is not None:
+            self.cache.move_to_end(key)
+            return result
+        result = Connections(board, player).build(board)
+        self.cache[key] = result
+        if len(self.cache) > self.size:
+            self.cache.popitem(last=False)
+        return result
+
+    def analyse(self, board):
+        return Analysis(board, self.connections(board, 1), self.connections(board, 2))
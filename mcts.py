@@ -0,0 +1,254 @@
+'''Monte Carlo tree search (UCT) player for Hex'''
+import os
+import random
+import time
+import threading
+import multiprocessing
+from math import sqrt, log
+from concurrent.futures import ProcessPoolExecutor, CancelledError
+from engine import *
+from ttable import TranspositionTable
+
+# memory of the transposition table every worker process keeps between searches
+TABLE_MEMORY = 32*2**20
+
+
+class Node:
+    '''a position in the search tree, wins are counted for the player who made the move'''
+    __slots__ = ('move', 'player', 'parent', 'children', 'untried', 'visits', 'wins', 'hash')
+
+    def __init__(self, move, player, parent, untried, hash):
+        self.move = move
+        self.player = player
+        self.parent = parent
+        self.hash = hash
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0
+
+    def select(self, exploration):
+        '''returns the child with the highest upper confidence bound'''
+        scale = exploration*sqrt(log(self.visits))
+        return max(self.children, key=lambda n: n.wins/n.visits + scale/sqrt(n.visits))
+
+
+def playout(size, cells, player):
+    '''fills the empty cells at random starting with player and returns the winner,
+    Hex has no draws so the board only has to be checked once when it is full'''
+    empty = [i for i, v in enumerate(cells) if not v]
+    random.shuffle(empty)
+    half = (len(empty) + 1)//2
+    for i in empty[:half]:
+        cells[i] = player
+    for i in empty[half:]:
+        cells[i] = 3 - player
+    return filledWinner(size, cells)
+
+
+class MCTS:
+    '''searches a move for the player to move within a time or an iteration budget'''
+    def __init__(self, time_limit=1.0, iterations=None, exploration=sqrt(2), table=None):
+        self.time_limit = time_limit
+        self.iterations = iterations
+        self.exploration = exploration
+        # statistics of positions met before, in this search or an earlier one
+        self.table = table
+        self.cancelled = False
+        self.playouts = 0
+        self.elapsed = 0.0
+
+    def cancel(self):
+        '''stops a running search, it returns the best move found so far'''
+        self.cancelled = True
+
+    def stopped(self):
+        '''is asked every few playouts, True ends the search early'''
+        return False
+
+    def rate(self):
+        '''returns the playouts per second of the last search'''
+        return self.playouts/self.elapsed if self.elapsed else 0.0
+
+    def root(self, board):
+        empty = [i for i, v in enumerate(board.cells) if not v]
+        random.shuffle(empty)
+        return Node(None, 3 - board.move, None, empty, board.hash)
+
+    def iterate(self, board, root):
+        '''runs one selection, expansion, playout and backpropagation step'''
+        cells = bytearray(board.cells)
+        node = root
+        # selection
+        while not node.untried and node.children:
+            node = node.select(self.exploration)
+            cells[node.move] = node.player
+        # expansion
+        if node.untried:
+            move = node.untried.pop()
+            cells[move] = 3 - node.player
+            untried = node.untried[:]
+            random.shuffle(untried)
+            player = 3 - node.player
+            key = node.hash ^ board.keys[2*move + player - 1] ^ board.keys[-1]
+            child = Node(move, player, node, untried, key)
+            if self.table is not None:
+                known = self.table.probe(key)
+                if known:
+                    child.visits, child.wins = known[0], known[1]
+            node.children.append(child)
+            node = child
+        # simulation
+        winner = playout(board.size, cells, 3 - node.player)
+        # backpropagation
+        while node is not None:
+            node.visits += 1
+            if node.player == winner:
+                node.wins += 1
+            if self.table is not None and node.parent is not None:
+                self.table.store(node.hash, node.visits, node.wins)
+            node = node.parent
+
+    def run(self, board, root):
+        '''grows the tree until the budget is spent, returns the number of playouts'''
+        self.cancelled = False
+        start = time.perf_counter()
+        deadline = start + self.time_limit if self.time_limit else None
+        done = 0
+        while not self.cancelled:
+            if self.iterations and done >= self.iterations:
+                break
+            if done % 16 == 0 and (deadline and time.perf_counter() >= deadline or self.stopped()):
+                break
+            self.iterate(board, root)
+            done += 1
+        self.playouts = done
+        self.elapsed = time.perf_counter() - start
+        return done
+
+    def search(self, board):
+        '''returns the most visited move from the current position'''
+        root = self.root(board)
+        self.run(board, root)
+        if not root.children:
+            return root.untried[-1]
+        return max(root.children, key=lambda n: n.visits).move
+
+
+# the transposition table of a worker process
+worker_table = None
+# shared with the parent: the number of the search the workers should be on, bumped to cancel one
+worker_current = None
+
+def initWorker(current):
+    global worker_current
+    worker_current = current
+
+def rootSearch(board, time_limit, iterations, exploration, search=None):
+    '''grows an independent tree in a worker process and returns its root statistics,
+    a search that is no longer the current one stops within a few playouts'''
+    global worker_table
+    # every search reseeds, so the workers do not play out the same games
+    random.seed()
+    if worker_table is None:
+        worker_table = TranspositionTable(TABLE_MEMORY)
+    ai = MCTS(time_limit, iterations, exploration, worker_table)
+    if search is not None and worker_current is not None:
+        ai.stopped = lambda: worker_current.value != search
+    root = ai.root(board)
+    ai.run(board, root)
+    return [(n.move, n.visits, n.wins) for n in root.children], ai.playouts
+
+
+class ParallelMCTS(MCTS):
+    '''root parallel search: every worker process grows its own tree and the root statistics are summed'''
+    def __init__(self, workers=None, time_limit=1.0, iterations=None, exploration=sqrt(2)):
+        super().__init__(time_limit, iterations, exploration)
+        self.workers = workers or os.cpu_count()
+        self.pool = None
+        self.futures = []
+        # guards the number of the current search between the searching thread and cancel
+        self.lock = threading.Lock()
+        self.current = None
+
+    def start(self):
+        '''starts the worker processes, they are spawned rather than forked so that they do not
+        inherit the threads of pygame and SDL in whatever state they are in'''
+        if self.pool is None:
+            context = multiprocessing.get_context('spawn')
+            self.current = context.RawValue('i', 0)
+            self.pool = ProcessPoolExecutor(self.workers, mp_context=context,
+                                            initializer=initWorker, initargs=(self.current,))
+            for future in [self.pool.submit(int) for _ in range(self.workers)]:
+                future.result()
+
+    def cancel(self):
+        '''stops the running search, the workers give up within a few playouts and the ones that
+        have not started are dropped, so the next search does not queue behind it'''
+        super().cancel()
+        with self.lock:
+            if self.current is not None:
+                self.current.value += 1
+            for future in self.futures:
+                future.cancel()
+
+    def stop(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    def visits(self, board):
+        '''returns the visits of every move searched from the position, summed over all workers'''
+        self.start()
+        self.cancelled = False
+        start = time.perf_counter()
+        iterations = self.iterations and -(-self.iterations//self.workers)
+        with self.lock:
+            self.current.value += 1
+            futures = self.futures = [self.pool.submit(rootSearch, board, self.time_limit, iterations,
+                                                       self.exploration, self.current.value)
+                                      for _ in range(self.workers)]
+        visits = {}
+        self.playouts = 0
+        for future in futures:
+            try:
+                stats, playouts = future.result()
+            except CancelledError:
+                continue
+            self.playouts += playouts
+            for move, n, _ in stats:
+                visits[move] = visits.get(move, 0) + n
+        self.elapsed = time.perf_counter() - start
+        return visits
+
+    def search(self, board):
+        '''returns the move with the most visits summed over all workers'''
+        visits = self.visits(board)
+        if not visits:
+            return self.root(board).untried[-1]
+        return max(visits, key=visits.get)
+
+
+def scaling(sizes, workers, time_limit):
+    '''prints playouts per second of an empty board search for every size and worker count'''
+    print('size  ' + ''.join('{:>10}'.format('{} cpu'.format(w)) for w in workers))
+    for size in sizes:
+        rates = []
+        for w in workers:
+            ai = ParallelMCTS(w, time_limit)
+            ai.start()
+            ai.search(Board(size))
+            ai.stop()
+            rates.append(ai.rate())
+        print('{:<6}'.format(size) + ''.join('{:>10.0f}'.format(r) for r in rates))
+
+
+if __name__ == '__main__':
+    import argparse
+    from consts import MIN_BOARD_SIZE, MAX_BOARD_SIZE
+    parser = argparse.ArgumentParser(description='playouts per second against the number of worker processes')
+    parser.add_argument('--time', type=float, default=2.0, help='seconds per search')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count()])
+    parser.add_argument('--step', type=int, default=3, help='board size step')
+    args = parser.parse_args()
+    scaling(range(MIN_BOARD_SIZE, MAX_BOARD_SIZE + 1, args.step), sorted(set(args.workers)), args.time)
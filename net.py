@@ -0,0 +1,305 @@
+'''Network play: an asyncio server hosting many games and a small polling client for Game
+
+The protocol is line based ASCII, cells are indices row*size + column:
+
+    client                      server
+    PLAY <size>                 GAME <id> <player> <size>   joins a waiting game of that size or opens one,
+                                                            leaving the game the connection was in
+    NEW <size>                  GAME <id> 1 <size>          opens a game for a friend to join
+    JOIN <id>                   GAME <id> 2 <size>
+                                START                       sent to both players once the second one joins
+    MOVE <cell>                 MOVE <cell> <player>        sent to both players
+                                WIN <player>                after the winning move
+    STATE                       STATE <size> <to move> <cells as digits>
+    PING                        PONG
+                                LEFT                        the other player has gone
+                                ERR <reason>
+
+    python net.py serve --port 7777
+    python net.py bench --idle 2000 --games 200
+'''
+import time
+import socket
+import random
+import asyncio
+import argparse
+from engine import Board
+
+PORT = 7777
+
+
+class Match:
+    def __init__(self, id, size):
+        self.id = id
+        self.board = Board(size)
+        self.players = {}
+
+
+class Server:
+    '''keeps every game in memory, one coroutine per connection'''
+    def __init__(self):
+        self.matches = {}
+        self.waiting = {}
+        self.next_id = 1
+        self.connections = 0
+        self.moves = 0
+
+    def open(self, size):
+        match = Match(self.next_id, size)
+        self.matches[match.id] = match
+        self.next_id += 1
+        return match
+
+    def send(self, writer, line):
+        if writer is not None and not writer.is_closing():
+            writer.write(line.encode() + b'\n')
+
+    def broadcast(self, match, line):
+        for writer in match.players.values():
+            self.send(writer, line)
+
+    def seat(self, match, player, writer):
+        match.players[player] = writer
+        self.send(writer, 'GAME {} {} {}'.format(match.id, player, match.board.size))
+        if len(match.players) == 2:
+            self.waiting.pop(match.board.size, None)
+            self.broadcast(match, 'START')
+        return match, player
+
+    def command(self, words, seat, writer):
+        '''runs one command, returns the (match, player) the connection now plays in'''
+        match, player = seat
+        verb = words[0].upper() if words else ''
+        args = words[1:]
+        if verb in ('PLAY', 'NEW', 'JOIN') and match is not None:
+            # a new game on the same connection ends the last one
+            self.leave(match, player)
+            match = player = None
+        if verb == 'PING':
+            self.send(writer, 'PONG')
+        elif verb in ('PLAY', 'NEW') and match is None:
+            size = int(args[0])
+            if not 2 <= size <= 200:
+                raise ValueError('bad board size')
+            if verb == 'PLAY' and size in self.waiting:
+                return self.seat(self.waiting[size], 2, writer)
+            match = self.open(size)
+            if verb == 'PLAY':
+                self.waiting[size] = match
+            return self.seat(match, 1, writer)
+        elif verb == 'JOIN' and match is None:
+            match = self.matches.get(int(args[0]))
+            if match is None or len(match.players) != 1:
+                raise ValueError('no game to join')
+            return self.seat(match, 2, writer)
+        elif verb == 'MOVE' and match is not None:
+            board = match.board
+            cell = int(args[0])
+            if len(match.players) < 2 or board.winner():
+                raise ValueError('the game is not running')
+            if board.move != player:
+                raise ValueError('not your move')
+            if not 0 <= cell < len(board.cells) or board.cells[cell]:
+                raise ValueError('cell is taken')
+            board.play(cell)
+            self.moves += 1
+            self.broadcast(match, 'MOVE {} {}'.format(cell, player))
+            if board.winner():
+                self.broadcast(match, 'WIN {}'.format(board.winner()))
+        elif verb == 'STATE' and match is not None:
+            board = match.board
+            self.send(writer, 'STATE {} {} {}'.format(board.size, board.move,
+                                                      ''.join(str(v) for v in board.cells)))
+        else:
+            raise ValueError('unknown command')
+        return match, player
+
+    def leave(self, match, player):
+        if match is None:
+            return
+        match.players.pop(player, None)
+        self.broadcast(match, 'LEFT')
+        if self.waiting.get(match.board.size) is match:
+            del self.waiting[match.board.size]
+        if not match.players:
+            del self.matches[match.id]
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        seat = (None, None)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    seat = self.command(line.decode('ascii').split(), seat, writer)
+                except (ValueError, IndexError, UnicodeDecodeError) as e:
+                    self.send(writer, 'ERR {}'.format(e))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            self.leave(*seat)
+            writer.close()
+
+    async def serve(self, host='0.0.0.0', port=PORT):
+        return await asyncio.start_server(self.handle, host, port, backlog=4096)
+
+
+class Remote:
+    '''a non-blocking connection polled once a frame by Game, so the pygame loop never waits on the network'''
+    def __init__(self, host, port=PORT):
+        self.sock = socket.create_connection((host, port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.setblocking(False)
+        self.buffer = b''
+        # lines the socket has not taken yet, sent on by the following polls
+        self.outgoing = b''
+
+    def send(self, line):
+        self.outgoing += line.encode() + b'\n'
+        try:
+            self.flush()
+        except OSError:
+            # the next poll finds the connection gone and reports it
+            pass
+
+    def flush(self):
+        '''sends as much of the outgoing lines as the socket takes without waiting'''
+        while self.outgoing:
+            try:
+                sent = self.sock.send(self.outgoing)
+            except BlockingIOError:
+                return
+            self.outgoing = self.outgoing[sent:]
+
+    def poll(self):
+        '''returns the lines that have arrived, split into words, raises OSError once the connection is
+        gone and UnicodeDecodeError for a line that is not ASCII'''
+        self.flush()
+        try:
+            while True:
+                data = self.sock.recv(65536)
+                if not data:
+                    raise ConnectionError('the server has closed the connection')
+                self.buffer += data
+        except BlockingIOError:
+            pass
+        *lines, self.buffer = self.buffer.split(b'\n')
+        return [line.decode('ascii').split() for line in lines]
+
+    def close(self):
+        self.sock.close()
+
+
+async def client(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.transport.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return reader, writer
+
+
+async def simulatedPlayer(host, port, size, seat, latency):
+    '''plays random moves until the game is won, seat is a future with the id of the game to join,
+    or None to open the game and set the id of the one it opened'''
+    reader, writer = await client(host, port)
+    if seat.done():
+        writer.write('JOIN {}\n'.format(seat.result()).encode())
+    else:
+        writer.write('NEW {}\n'.format(size).encode())
+    taken = set()
+    player = None
+    sent = 0.0
+
+    def move():
+        nonlocal sent
+        cell = random.choice([i for i in range(size*size) if i not in taken])
+        sent = time.perf_counter()
+        writer.write('MOVE {}\n'.format(cell).encode())
+
+    while True:
+        words = (await reader.readline()).decode().split()
+        if not words or words[0] in ('WIN', 'LEFT'):
+            break
+        if words[0] == 'GAME':
+            player = int(words[2])
+            if not seat.done():
+                seat.set_result(words[1])
+        elif words[0] == 'START' and player == 1:
+            move()
+        elif words[0] == 'MOVE':
+            cell, by = int(words[1]), int(words[2])
+            taken.add(cell)
+            if by == player:
+                latency.append((time.perf_counter() - sent)*1000)
+            else:
+                # after the winning move this is refused with ERR, which is fine
+                if len(taken) < size*size:
+                    move()
+    writer.close()
+
+
+async def simulatedGame(host, port, size, latency):
+    seat = asyncio.get_running_loop().create_future()
+    opener = asyncio.ensure_future(simulatedPlayer(host, port, size, seat, latency))
+    await asyncio.wait([opener, seat], return_when=asyncio.FIRST_COMPLETED)
+    await asyncio.gather(opener, simulatedPlayer(host, port, size, seat, latency))
+
+
+async def simulate(host, port, idle, games, size):
+    '''holds idle connections open while simulated games are played, then reports the move latency'''
+    idlers = []
+    for start in range(0, idle, 500):
+        idlers += await asyncio.gather(*(client(host, port) for _ in range(min(500, idle - start))))
+    latency = []
+    start = time.perf_counter()
+    await asyncio.gather(*(simulatedGame(host, port, size, latency) for _ in range(games)))
+    elapsed = time.perf_counter() - start
+    for _, writer in idlers:
+        writer.close()
+    await asyncio.gather(*(writer.wait_closed() for _, writer in idlers))
+    latency.sort()
+    pick = lambda q: latency[min(len(latency)-1, int(q*len(latency)))] if latency else 0.0
+    print('{} idle connections, {} games, {} moves in {:.2f}s, {:.0f} moves/s'.format(
+        idle, games, len(latency), elapsed, len(latency)/elapsed))
+    print('move latency ms: p50 {:.2f}  p90 {:.2f}  p99 {:.2f}  max {:.2f}'.format(
+        pick(0.5), pick(0.9), pick(0.99), latency[-1] if latency else 0.0))
+
+
+async def bench(args):
+    server = None
+    host = args.host
+    if host is None:
+        hosted = Server()
+        server = await hosted.serve('127.0.0.1', args.port)
+        host = '127.0.0.1'
+    await simulate(host, args.port, args.idle, args.games, args.size)
+    if server is not None:
+        # let the handlers see the connections close before the loop goes away
+        while hosted.connections:
+            await asyncio.sleep(0.01)
+        print('server played {} moves'.format(hosted.moves))
+        server.close()
+        await server.wait_closed()
+
+
+async def serve(args):
+    server = await Server().serve(args.host or '0.0.0.0', args.port)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Hex game server')
+    parser.add_argument('mode', choices=['serve', 'bench'])
+    parser.add_argument('--host', help='address to listen on, or a server to bench against')
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--idle', type=int, default=1000, help='idle connections held open while benching')
+    parser.add_argument('--games', type=int, default=100, help='simulated games played while benching')
+    parser.add_argument('--size', type=int, default=11)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args) if args.mode == 'serve' else bench(args))
+    except KeyboardInterrupt:
+        pass
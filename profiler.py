@@ -0,0 +1,156 @@
+'''Per phase timings of the game loops, an overlay showing them and exports for a closer look
+
+Every loop calls begin() when a frame starts and lap(name) after each of its phases,
+the time since the previous lap is booked to that phase. The last PROFILE_FRAMES frames
+are kept in a ring buffer.
+
+    F3  shows or hides the overlay
+    F4  writes the buffer to profiles/frames-<time>.csv and .json
+    F5  runs cProfile over the next PROFILE_CAPTURE frames and writes profiles/frames-<time>.prof
+'''
+import os
+import csv
+import json
+import time
+import pstats
+import cProfile
+from array import array
+import pygame as pg
+from funcs import *
+from consts import *
+
+
+class FrameProfiler:
+    def __init__(self, frames=PROFILE_FRAMES):
+        self.frames = frames
+        # frames started so far, the one in progress is at slot count % frames
+        self.count = 0
+        self.totals = array('d', bytes(8*frames))
+        self.screens = [None]*frames
+        # seconds per frame of every phase, in the order the phases were first seen
+        self.phases = {}
+        self.start = self.last = None
+        self.visible = False
+        self.panel = None
+        self.drawn = None
+        self.profile = None
+        self.capturing = self.captured = 0
+
+    def begin(self, screen):
+        '''closes the last frame and starts a new one of the loop named screen'''
+        now = time.perf_counter()
+        if self.start is not None:
+            self.totals[self.count % self.frames] = now - self.start
+            self.count += 1
+        slot = self.count % self.frames
+        self.screens[slot] = screen
+        for times in self.phases.values():
+            times[slot] = 0.0
+        self.start = self.last = now
+        if self.capturing:
+            self.capturing -= 1
+            if not self.capturing:
+                self.stopCapture()
+
+    def lap(self, name):
+        '''books the time since the last lap to the phase name'''
+        now = time.perf_counter()
+        times = self.phases.get(name)
+        if times is None:
+            times = self.phases[name] = array('d', bytes(8*self.frames))
+        times[self.count % self.frames] += now - self.last
+        self.last = now
+
+    def recorded(self):
+        '''slots of the finished frames in the buffer, oldest first'''
+        n = min(self.count, self.frames)
+        return [(self.count - n + k) % self.frames for k in range(n)]
+
+    def averages(self, frames=PROFILE_AVERAGE):
+        '''fps, frame time and the time of every phase in ms, over the last frames of the current loop'''
+        slots = [s for s in self.recorded()[-frames:] if self.screens[s] == self.screens[self.count % self.frames]]
+        if not slots:
+            return 0.0, 0.0, {}
+        total = sum(self.totals[s] for s in slots)
+        phases = {name: sum(times[s] for s in slots)*1000/len(slots) for name, times in self.phases.items()
+                  if any(times[s] for s in slots)}
+        return len(slots)/total if total else 0.0, total*1000/len(slots), phases
+
+    def handle(self, event):
+        '''the profiler's keys, returns True if the event was one of them'''
+        if event.type != pg.KEYDOWN:
+            return False
+        if event.key == pg.K_F3:
+            self.visible = not self.visible
+            self.panel = None
+        elif event.key == pg.K_F4:
+            print('frame timings written to', self.export())
+        elif event.key == pg.K_F5:
+            self.capture()
+        else:
+            return False
+        return True
+
+    def show(self, surface):
+        '''draws the overlay, returns the rectangles of the screen it has changed'''
+        rects = [self.drawn] if self.drawn else []
+        self.drawn = None
+        if not self.visible:
+            return rects
+        if self.panel is None or self.count % PROFILE_REFRESH == 0:
+            # numbers are rendered a few times a second only, so they stay readable and cheap
+            self.panel = self.render()
+        self.drawn = surface.blit(self.panel, (W - self.panel.get_width() - 10, 10))
+        return rects + [self.drawn]
+
+    def render(self):
+        fps, frame, phases = self.averages()
+        lines = ['{:.0f} fps  {:.2f} ms'.format(fps, frame)]
+        lines += ['{} {:.2f}'.format(name, ms) for name, ms in phases.items()]
+        if self.capturing:
+            lines.append('cProfile: {} frames'.format(self.capturing))
+        font = getFont(18)
+        texts = [font.render(line, True, WHITE) for line in lines]
+        panel = pg.Surface((max(t.get_width() for t in texts) + 10, sum(t.get_height() for t in texts) + 10))
+        panel.set_alpha(200)
+        y = 5
+        for text in texts:
+            panel.blit(text, (5, y))
+            y += text.get_height()
+        return panel
+
+    def filename(self, ext):
+        os.makedirs(PROFILE_FOLDER, exist_ok=True)
+        return os.path.join(PROFILE_FOLDER, time.strftime('frames-%Y%m%d-%H%M%S') + ext)
+
+    def export(self):
+        '''writes the frames in the buffer as CSV and as JSON, returns the name of the CSV file'''
+        names = list(self.phases)
+        rows = [dict(frame=self.count - len(self.recorded()) + k, screen=self.screens[s],
+                     total=self.totals[s]*1000, **{name: self.phases[name][s]*1000 for name in names})
+                for k, s in enumerate(self.recorded())]
+        csv_name = self.filename('.csv')
+        with open(csv_name, 'w', newline='') as f:
+            writer = csv.DictWriter(f, ['frame', 'screen', 'total'] + names)
+            writer.writeheader()
+            writer.writerows(rows)
+        with open(csv_name[:-4] + '.json', 'w') as f:
+            json.dump({'unit': 'ms', 'frames': rows}, f)
+        return csv_name
+
+    def capture(self, frames=PROFILE_CAPTURE):
+        '''profiles the next frames with cProfile'''
+        if self.profile is not None:
+            return
+        self.profile = cProfile.Profile()
+        self.capturing = self.captured = frames
+        self.panel = None
+        self.profile.enable()
+
+    def stopCapture(self):
+        self.profile.disable()
+        name = self.filename('.prof')
+        self.profile.dump_stats(name)
+        print('cProfile of {} frames written to {}'.format(self.captured, name))
+        pstats.Stats(self.profile).sort_stats('cumulative').print_stats(15)
+        self.profile = None
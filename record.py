@@ -0,0 +1,238 @@
+'''Compact binary game records and an append-only archive of them, read through mmap
+
+A record is a header (board size, winner, number of moves) followed by one
+little endian 16 bit cell index (row*size + column) per move. The archive file
+is a magic string followed by records, next to it an index file holds the
+64 bit offset of every record so any game can be read without parsing the rest.
+
+    python record.py games.hexa                  lists the archive
+    python record.py games.hexa --export 3       prints game 3 as SGF
+    python record.py games.hexa --import a.sgf   appends games from SGF files
+'''
+import os
+import re
+import sys
+import mmap
+import struct
+from array import array
+from collections import namedtuple
+
+MAGIC = b'HEXA\x01'
+HEADER = struct.Struct('<HBH')
+OFFSET = struct.Struct('<Q')
+
+Record = namedtuple('Record', 'size winner moves')
+
+
+def encode(size, winner, moves):
+    '''packs a game into bytes'''
+    cells = array('H', moves)
+    if sys.byteorder == 'big':
+        cells.byteswap()
+    return HEADER.pack(size, winner, len(cells)) + cells.tobytes()
+
+
+def decode(data, offset=0):
+    '''unpacks the record starting at offset, returns it and the offset of the next one'''
+    size, winner, count = HEADER.unpack_from(data, offset)
+    start = offset + HEADER.size
+    end = start + 2*count
+    if end > len(data):
+        raise ValueError('record at {} is cut short'.format(offset))
+    moves = array('H')
+    moves.frombytes(data[start:end])
+    if sys.byteorder == 'big':
+        moves.byteswap()
+    return Record(size, winner, moves), end
+
+
+def column(c):
+    '''0 -> a, 25 -> z, 26 -> aa, like spreadsheet columns'''
+    name = ''
+    c += 1
+    while c:
+        c, rest = divmod(c - 1, 26)
+        name = chr(ord('a') + rest) + name
+    return name
+
+
+def cellName(size, i):
+    r, c = divmod(i, size)
+    return column(c) + str(r + 1)
+
+
+def cellIndex(size, name):
+    match = re.fullmatch(r'([a-z]+)(\d+)', name.strip().lower())
+    if not match:
+        raise ValueError('bad cell name {!r}'.format(name))
+    c = 0
+    for ch in match.group(1):
+        c = c*26 + ord(ch) - ord('a') + 1
+    r, c = int(match.group(2)) - 1, c - 1
+    if not (0 <= r < size and 0 <= c < size):
+        raise ValueError('cell {} is outside a {}x{} board'.format(name, size, size))
+    return r*size + c
+
+
+def toSGF(record):
+    '''writes a game in the SGF notation used by Hex programs (GM[11]), green moves first as B'''
+    moves = ''.join(';{}[{}]'.format('BW'[k % 2], cellName(record.size, i))
+                    for k, i in enumerate(record.moves))
+    result = {1: 'RE[B+]', 2: 'RE[W+]'}.get(record.winner, '')
+    return '(;FF[4]GM[11]SZ[{}]{}{})'.format(record.size, result, moves)
+
+
+def fromSGF(text):
+    '''reads every game of an SGF file, the winner is taken from RE if it is there'''
+    games = []
+    for game in re.findall(r'\(;(.*?)\)', text, re.S):
+        size = re.search(r'SZ\[(\d+)\]', game)
+        if not size:
+            raise ValueError('game without a board size')
+        size = int(size.group(1))
+        moves = [cellIndex(size, name) for name in re.findall(r';\s*[BW]\[([a-z]+\d+)\]', game)]
+        result = re.search(r'RE\[([BW])\+', game)
+        winner = 'BW'.index(result.group(1)) + 1 if result else 0
+        games.append(Record(size, winner, array('H', moves)))
+    return games
+
+
+class Archive:
+    '''append-only file of records with an offset index, both read through mmap'''
+    def __init__(self, filename):
+        self.filename = filename
+        self.index_name = filename + '.idx'
+        self.data = None
+        self.index = None
+        # where the last indexed record ends
+        self.end = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for m in (self.data, self.index):
+            if m is not None:
+                m.close()
+        self.data = self.index = None
+
+    def append(self, size, winner, moves):
+        '''adds a game, the record is written before its offset so a crash at worst leaves it unindexed'''
+        folder = os.path.dirname(self.filename)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.open()
+        end = self.end
+        self.close()
+        with open(self.filename, 'ab') as f:
+            if f.tell() == 0:
+                f.write(MAGIC)
+            elif f.tell() > end:
+                # drop a record cut short by a crash, truncating does not move the file position
+                f.truncate(end)
+                f.seek(end)
+            offset = f.tell()
+            f.write(encode(size, winner, moves))
+        with open(self.index_name, 'ab') as f:
+            f.write(OFFSET.pack(offset))
+        return offset
+
+    def map(self, name):
+        if not os.path.exists(name) or os.path.getsize(name) == 0:
+            return None
+        with open(name, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def open(self, check=True):
+        if self.data is not None:
+            return
+        self.data = self.map(self.filename)
+        if self.data is not None and self.data[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError('{} is not a game archive'.format(self.filename))
+        self.index = self.map(self.index_name)
+        if self.data is None:
+            self.end = 0
+            return
+        # the last indexed record has to end where the file ends
+        n = self.count()
+        try:
+            self.end = decode(self.data, self.offset(n - 1))[1] if n else len(MAGIC)
+        except (ValueError, struct.error):
+            self.end = None
+        if check and self.end != len(self.data):
+            self.reindex()
+
+    def reindex(self):
+        '''rebuilds the index file by walking the records, returns the number of games'''
+        self.close()
+        data = self.map(self.filename)
+        offsets = []
+        if data is not None:
+            pos = len(MAGIC)
+            try:
+                while pos < len(data):
+                    offsets.append(pos)
+                    pos = decode(data, pos)[1]
+            except (ValueError, struct.error):
+                # a record cut short by a crash is left out
+                offsets.pop()
+            data.close()
+        with open(self.index_name, 'wb') as f:
+            f.write(b''.join(OFFSET.pack(o) for o in offsets))
+        self.open(check=False)
+        return len(offsets)
+
+    def count(self):
+        return len(self.index)//OFFSET.size if self.index is not None else 0
+
+    def offset(self, i):
+        return OFFSET.unpack_from(self.index, i*OFFSET.size)[0]
+
+    def __len__(self):
+        self.open()
+        return self.count()
+
+    def __getitem__(self, i):
+        '''reads a single game without touching the others'''
+        self.open()
+        n = self.count()
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError('game {} is not in the archive'.format(i))
+        return decode(self.data, self.offset(i))[0]
+
+    def __iter__(self):
+        '''streams the games in the order they were played'''
+        self.open()
+        for i in range(self.count()):
+            yield decode(self.data, self.offset(i))[0]
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='lists, exports and imports archived games')
+    parser.add_argument('archive')
+    parser.add_argument('--export', type=int, metavar='N', help='print game N as SGF')
+    parser.add_argument('--import', dest='files', nargs='+', metavar='SGF', help='append games from SGF files')
+    parser.add_argument('--reindex', action='store_true', help='rebuild the offset index')
+    args = parser.parse_args()
+    archive = Archive(args.archive)
+    if args.reindex:
+        print(archive.reindex(), 'games indexed')
+    if args.files:
+        for name in args.files:
+            with open(name) as f:
+                for game in fromSGF(f.read()):
+                    archive.append(game.size, game.winner, game.moves)
+    if args.export is not None:
+        print(toSGF(archive[args.export]))
+    elif not args.files and not args.reindex:
+        for i, game in enumerate(archive):
+            print('{:>6} {}x{} {:>4} moves, winner {}'.format(i, game.size, game.size, len(game.moves),
+                                                             {1: 'green', 2: 'blue'}.get(game.winner, '-')))
+    archive.close()
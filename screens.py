@@ -0,0 +1,290 @@
+'''The screens of the game as states of one loop, see Game.run
+
+A screen handles events and returns the screen to go on with: itself, another one or None to quit.
+It is drawn again only when it has been invalidated, so an idle window does no work at all.
+'''
+import pygame as pg
+from funcs import *
+from consts import *
+from Button import *
+
+
+class Screen:
+    name = ''
+
+    def __init__(self, game):
+        self.game = game
+        self.buttons = []
+        self.invalid = True
+
+    def enter(self):
+        '''is called when the loop switches to this screen'''
+        self.invalid = True
+        self.game.redraw = True
+
+    def leave(self):
+        '''is called when the loop switches from this screen to another one or quits'''
+        pass
+
+    def timeout(self):
+        '''ms to wait for events, 0 waits for the next one however long it takes'''
+        return 0
+
+    def handle(self, event):
+        if event.type == pg.QUIT:
+            # if exit button is pressed
+            return None
+        if event.type == pg.MOUSEBUTTONDOWN:
+            # if mouse is pressed check button overlapping
+            for button in self.buttons:
+                if button.triggered(channel=self.game.click_sound_channel,
+                                    sound=self.game.click_sound,
+                                    playing=self.game.sound_state):
+                    self.invalid = True
+                    return self.click(button)
+        return self
+
+    def click(self, button):
+        return self
+
+    def update(self):
+        '''runs once a loop after the events, returns the next screen'''
+        # highlight buttons, a list so that every button is updated
+        if any([button.highlighted() for button in self.buttons]):
+            self.invalid = True
+        return self
+
+    def draw(self):
+        pass
+
+    def rects(self):
+        '''the parts of the display to update after draw, None for all of it'''
+        return None
+
+
+class StartScreen(Screen):
+    name = 'start'
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.play = Button((W/2, 2*H/3), 80, 'Play')
+        self.settings = Button((150, H-75), 50, 'Settings')
+        self.rules = Button((W-100, H-75), 50, 'Rules')
+        self.buttons = [self.play, self.settings, self.rules]
+
+    def click(self, button):
+        if button is self.play:
+            self.game.reset()
+            return BoardScreen(self.game)
+        if button is self.rules:
+            return RulesScreen(self.game)
+        return SettingsScreen(self.game)
+
+    def draw(self):
+        screen = self.game.screen
+        screen.blit(loadImage(BG_IMG), (0, 0))
+        textOut(screen, 'HEX', 200, ORANGE, (W/2, H/3))
+        for button in self.buttons:
+            button.show(screen)
+
+
+class RulesScreen(Screen):
+    name = 'rules'
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.buttons = [Button((30, 30), 50, img=loadImage(BACK_IMG))]
+
+    def click(self, button):
+        return StartScreen(self.game)
+
+    def draw(self):
+        screen = self.game.screen
+        screen.blit(loadImage(BG_IMG), (0, 0))
+        textOut(screen, 'Rules', 100, ORANGE, (W/2, H/3))
+        textOutMultiline(screen, loadText(RULES), 30, BLACK, (W/2, H/3))
+        for button in self.buttons:
+            button.show(screen)
+
+
+class SettingsScreen(Screen):
+    name = 'settings'
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.back = Button((30, 30), 50, img=loadImage(BACK_IMG))
+        self.up = Button((2*W/3+60, H/2-25), 50, img=loadImage(UP_IMG))
+        self.down = Button((2*W/3+60, H/2+25), 50, img=loadImage(DOWN_IMG))
+        self.music_switch = Button((2*W/3-50, H/2+60), 50, 'On' if game.music_state else 'Off', col=DARKRED)
+        self.sound_switch = Button((2*W/3-50, H/2+120), 50, 'On' if game.sound_state else 'Off', col=DARKRED)
+        self.ai_switch = Button((2*W/3-50, H/2+180), 50, 'On' if game.ai_state else 'Off', col=DARKRED)
+        self.buttons = [self.back, self.up, self.down, self.music_switch, self.sound_switch, self.ai_switch]
+
+    def click(self, button):
+        game = self.game
+        if button is self.back:
+            return StartScreen(game)
+        if button is self.up:
+            step = 1 if game.size < MAX_BOARD_SIZE else LARGE_BOARD_STEP
+            game.size = min(MAX_LARGE_BOARD_SIZE, game.size+step)
+        elif button is self.down:
+            step = 1 if game.size <= MAX_BOARD_SIZE else LARGE_BOARD_STEP
+            game.size = max(MIN_BOARD_SIZE, game.size-step)
+        elif button is self.music_switch:
+            if game.music_state:
+                pg.mixer.music.stop()
+                game.music_state = False
+            else:
+                # stays off if there is no music to play
+                game.music_state = playMusic(BACKGROUND_MUSIC)
+            button.text = 'On' if game.music_state else 'Off'
+        elif button is self.sound_switch:
+            game.sound_state = not game.sound_state
+            button.text = 'On' if game.sound_state else 'Off'
+        elif button is self.ai_switch:
+            game.ai_state = not game.ai_state
+            if game.ai_state:
+                # the workers are started here so the first search does not wait for them
+                game.ai.start()
+            button.text = 'On' if game.ai_state else 'Off'
+        return self
+
+    def draw(self):
+        screen = self.game.screen
+        screen.blit(loadImage(BG_IMG), (0, 0))
+        textOut(screen, 'Settings', 100, ORANGE, (W/2, H/4))
+        textOut(screen, 'Board size:', 50, BLACK, (W/3, H/2))
+        textOut(screen, self.game.size, 50, BLACK, (2*W/3, H/2))
+        textOut(screen, 'Music:', 50, BLACK, (W/3, H/2+60))
+        textOut(screen, 'Sound:', 50, BLACK, (W/3, H/2+120))
+        textOut(screen, 'AI:', 50, BLACK, (W/3, H/2+180))
+        for button in self.buttons:
+            button.show(screen)
+
+
+class BoardScreen(Screen):
+    '''the game itself, the board is kept up to date through the dirty rectangles of Game'''
+    name = 'game'
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.pause = Button((30, 30), 50, img=loadImage(PAUSE_IMG))
+        self.buttons = [self.pause]
+
+    def enter(self):
+        super().enter()
+        self.game.heat()
+
+    def leave(self):
+        # no playouts while the board is not shown
+        self.game.heatmap.stop()
+
+    def timeout(self):
+        # moves from the server are polled for, the computer's moves post AI_DONE
+        return POLL_TIME if self.game.remote else 0
+
+    def handle(self, event):
+        if self.game.view(event):
+            # panning and zooming a large board
+            return self
+        if event.type == pg.MOUSEBUTTONDOWN:
+            # a zoomed in large board can reach under the history, the board takes the click there
+            row = None if self.game.cell(event.pos) else self.game.historyAt(event.pos)
+            if row is not None:
+                # replays the game up to the move that was clicked
+                self.game.seek(row)
+            else:
+                # the players move
+                self.game.tick(event.pos)
+        elif event.type == pg.KEYDOWN and event.mod & pg.KMOD_CTRL:
+            if event.key == pg.K_z and event.mod & pg.KMOD_SHIFT or event.key == pg.K_y:
+                self.game.redo()
+            elif event.key == pg.K_z:
+                self.game.undo()
+        elif event.type == pg.KEYDOWN and event.key == pg.K_h:
+            # shows or hides what H-search knows about the position
+            self.game.hints = not self.game.hints
+            self.game.hint()
+            self.invalid = True
+        elif event.type == pg.KEYDOWN and event.key == pg.K_m:
+            # shows or hides the win chances of the empty cells
+            self.game.heat_state = not self.game.heat_state
+            self.game.heat()
+            self.invalid = True
+        elif event.type in (HEATMAP_DONE, HINTS_DONE):
+            self.invalid = True
+        return super().handle(event)
+
+    def click(self, button):
+        return PauseScreen(self.game, self)
+
+    def update(self):
+        game = self.game
+        game.highlight(pg.mouse.get_pos())
+        game.profiler.lap('highlight')
+        game.think()
+        status = game.status
+        game.sync()
+        if game.status != status:
+            self.invalid = True
+        game.profiler.lap('ai')
+        winner = game.checkWin()
+        game.profiler.lap('checkWin')
+        if winner:
+            return GameOverScreen(game, winner)
+        return super().update()
+
+    def draw(self):
+        self.game.showGrid()
+        self.hints = self.game.showHints()
+        self.history = self.game.showHistory()
+        self.status = self.game.showStatus()
+        for button in self.buttons:
+            button.show(self.game.screen)
+
+    def rects(self):
+        return [button.area() for button in self.buttons] + [self.history] + self.hints + self.status
+
+
+class PauseScreen(Screen):
+    name = 'pause'
+
+    def __init__(self, game, board):
+        super().__init__(game)
+        self.board = board
+        self.resume = Button((W/2, H/3), 80, 'Resume', col=ORANGE)
+        self.home = Button((W/2, H/2), 50, 'Home', col=WHITE)
+        self.buttons = [self.home, self.resume]
+        self.backdrop = game.backdrop()
+
+    def click(self, button):
+        if button is self.home:
+            return StartScreen(self.game)
+        return self.board
+
+    def draw(self):
+        self.game.screen.blit(self.backdrop, (0, 0))
+        for button in self.buttons:
+            button.show(self.game.screen)
+
+    def rects(self):
+        return [button.area() for button in self.buttons]
+
+
+class GameOverScreen(PauseScreen):
+    name = 'game over'
+
+    def __init__(self, game, winner):
+        Screen.__init__(self, game)
+        self.home = Button((W/2, 2*H/3), 50, 'Home', col=WHITE)
+        self.buttons = [self.home]
+        game.saveRecord()
+        self.backdrop = game.backdrop()
+        textOut(self.backdrop, 'GAME OVER', 80, ORANGE, (W/2, H/3))
+        if winner == 2:
+            textOut(self.backdrop, 'Blue won', 60, BLUE, (W/2, H/2))
+        else:
+            textOut(self.backdrop, 'Green won', 60, GREEN, (W/2, H/2))
+
+    def click(self, button):
+        return StartScreen(self.game)
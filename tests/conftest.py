@@ -0,0 +1,22 @@
+import os
+import sys
+import pytest
+
+# the modules of the game sit next to this folder, pygame runs without a window or sound device
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+# funcs goes first, as in HexMain, consts and Game import it back
+import funcs
+from engine import Board
+
+
+@pytest.fixture
+def position():
+    '''builds the board after the moves, green moves first'''
+    def play(size, moves):
+        board = Board(size)
+        for i in moves:
+            board.play(i)
+        return board
+    return play
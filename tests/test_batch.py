@@ -0,0 +1,83 @@
+import heapq
+import random
+import tracemalloc
+import pytest
+
+np = pytest.importorskip('numpy')
+import batch
+
+
+def randomBoards(position, size, count, seed):
+    '''positions of random games cut off after any number of moves'''
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(count):
+        cells = list(range(size*size))
+        rng.shuffle(cells)
+        boards.append(position(size, cells[:rng.randrange(size*size + 1)]))
+    return boards
+
+
+@pytest.mark.parametrize('size', [1, 2, 5, 11, 19])
+def test_winners_agree_with_the_engine(size, position):
+    boards = randomBoards(position, size, 300, size)
+    found = batch.winners(batch.fromBoards(boards))
+    assert found.tolist() == [board.winner() for board in boards]
+
+
+def test_winners_over_several_chunks(monkeypatch, position):
+    boards = randomBoards(position, 7, 100, 0)
+    # a few boards per chunk
+    monkeypatch.setattr(batch, 'MEMORY', 4*7*7*3)
+    assert batch.winners(batch.fromBoards(boards)).tolist() == [board.winner() for board in boards]
+
+
+def shortest(board, player):
+    '''the fewest empty cells player has to fill to join their sides, by Dijkstra over the cells'''
+    size = board.size
+    cost = [0 if v == player else 1 if v == 0 else None for v in board.cells]
+    if player == 1:
+        start = range(size)
+        end = lambda i: i >= size*size - size
+    else:
+        start = range(0, size*size, size)
+        end = lambda i: i % size == size-1
+    queue = [(cost[i], i) for i in start if cost[i] is not None]
+    heapq.heapify(queue)
+    done = set()
+    while queue:
+        d, i = heapq.heappop(queue)
+        if i in done:
+            continue
+        if end(i):
+            return d
+        done.add(i)
+        for j in board.adjacent[i]:
+            if cost[j] is not None and j not in done:
+                heapq.heappush(queue, (d + cost[j], j))
+    return batch.INF
+
+
+@pytest.mark.parametrize('size', [1, 2, 5, 11])
+def test_distances_agree_with_dijkstra(size, position, monkeypatch):
+    boards = randomBoards(position, size, 200, size)
+    # a few boards per chunk
+    monkeypatch.setattr(batch, 'MEMORY', 40*batch.DISTANCES_CELL*size*size)
+    expected = [(shortest(board, 1), shortest(board, 2)) for board in boards]
+    assert [tuple(d) for d in batch.distances(batch.fromBoards(boards)).tolist()] == expected
+    cap = lambda d: min(d, size*size)
+    assert batch.evaluate(batch.fromBoards(boards)).tolist() == [cap(b) - cap(g) for g, b in expected]
+
+
+@pytest.mark.parametrize('size', [3, 11, 19])
+def test_chunks_stay_within_the_memory_budget(size, monkeypatch):
+    boards = np.random.default_rng(size).integers(0, 3, (3000, size, size), dtype=np.uint8)
+    monkeypatch.setattr(batch, 'MEMORY', 2**20)
+    for work in (batch.winners, batch.distances, batch.evaluate):
+        tracemalloc.start()
+        try:
+            work(boards)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        assert peak <= batch.MEMORY, work.__name__
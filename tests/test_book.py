@@ -0,0 +1,38 @@
+import random
+from engine import Board
+from book import Book, add, canonical, rotate, write
+
+
+def test_a_position_and_its_rotation_share_a_key(position):
+    rng = random.Random(1)
+    for size in (3, 5, 11):
+        for n in range(0, 8):
+            moves = rng.sample(range(size*size), n)
+            board = position(size, moves)
+            turned = position(size, [rotate(size, i) for i in moves])
+            assert canonical(board)[0] == canonical(turned)[0]
+
+
+def test_lookup_turns_the_move_with_the_board(tmp_path, position):
+    name = str(tmp_path / 'book.hexb')
+    size = 7
+    moves = [24, 3, 30]
+    board = position(size, moves)
+    entries = {}
+    add(entries, board, 10, 5)
+    add(entries, Board(size), 24, 9)
+    write(name, entries)
+    book = Book(name)
+    assert len(book) == 2
+    assert book.lookup(board) == 10
+    assert book.lookup(position(size, [rotate(size, i) for i in moves])) == rotate(size, 10)
+    assert book.lookup(Board(size)) == 24
+    # another size or a position the book does not know
+    assert book.lookup(Board(5)) is None
+    assert book.lookup(position(size, [0])) is None
+    book.close()
+
+
+def test_a_missing_book_knows_nothing(tmp_path):
+    book = Book(str(tmp_path / 'none.hexb'))
+    assert book.lookup(Board(11)) is None and len(book) == 0
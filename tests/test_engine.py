@@ -0,0 +1,75 @@
+import random
+import pytest
+from engine import Board, filledWinner
+
+
+def joined(size, cells, player):
+    '''whether player joins their sides, by a flood fill over (row, column) with nothing from engine'''
+    if player == 1:
+        start = [(0, c) for c in range(size)]
+        done = lambda r, c: r == size-1
+    else:
+        start = [(r, 0) for r in range(size)]
+        done = lambda r, c: c == size-1
+    stack = [(r, c) for r, c in start if cells[r*size + c] == player]
+    seen = set(stack)
+    while stack:
+        r, c = stack.pop()
+        if done(r, c):
+            return True
+        for dr, dc in ((1, 0), (1, -1), (0, 1), (0, -1), (-1, 1), (-1, 0)):
+            nr, nc = r+dr, c+dc
+            if 0 <= nr < size and 0 <= nc < size and (nr, nc) not in seen and cells[nr*size + nc] == player:
+                seen.add((nr, nc))
+                stack.append((nr, nc))
+    return False
+
+
+def bruteWinner(size, cells):
+    if joined(size, cells, 2):
+        return 2
+    return 1 if joined(size, cells, 1) else 0
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 5, 8, 11])
+def test_winner_agrees_with_a_flood_fill(size):
+    rng = random.Random(size)
+    for game in range(30):
+        board = Board(size)
+        cells = list(range(size*size))
+        rng.shuffle(cells)
+        for i in cells:
+            board.play(i)
+            assert board.winner() == bruteWinner(size, board.cells)
+        assert board.winner() == filledWinner(size, board.cells)
+
+
+@pytest.mark.parametrize('size', [3, 5, 11])
+def test_undo_and_redo_give_the_positions_of_a_replay(size, position):
+    rng = random.Random(100 + size)
+    board = Board(size)
+    for step in range(2000):
+        empty = [i for i, v in enumerate(board.cells) if not v]
+        roll = rng.random()
+        if board.history and roll < 0.3:
+            board.undo()
+        elif board.future and roll < 0.6:
+            board.redo()
+        elif board.history and roll < 0.65:
+            board.seek(rng.randrange(len(board.history) + len(board.future) + 1))
+        elif empty:
+            board.play(rng.choice(empty))
+        fresh = position(size, board.history)
+        assert board.cells == fresh.cells
+        assert (board.move, board.hash) == (fresh.move, fresh.hash)
+        assert board.winner() == bruteWinner(size, board.cells)
+
+
+def test_a_new_move_drops_the_moves_taken_back(position):
+    board = position(5, [0, 1, 2, 3])
+    board.seek(2)
+    assert list(board.future) == [3, 2]
+    board.play(2)
+    assert list(board.future) == [3]
+    board.play(7)
+    assert list(board.future) == []
@@ -0,0 +1,42 @@
+import pytest
+from consts import W, H, HISTORY_POS, HISTORY_WIDTH, HISTORY_ROW, HISTORY_ROWS
+from Game import Game
+
+
+@pytest.fixture(scope='module')
+def game():
+    return Game(5)
+
+
+@pytest.mark.parametrize('size', [5, 11, 20])
+def test_history_panel_is_clear_of_the_board(game, size):
+    game.size = size
+    game.reset()
+    x, y = HISTORY_POS
+    for px in range(int(x - HISTORY_WIDTH/2), int(x + HISTORY_WIDTH/2) + 1):
+        for py in range(int(y - HISTORY_ROW/2), int(y + (HISTORY_ROWS+1)*HISTORY_ROW)):
+            assert game.cell((px, py)) is None
+
+
+def test_history_rows_seek_and_the_title_does_not(game):
+    game.size = 5
+    game.reset()
+    for i in (12, 6, 18, 7):
+        game.place(*game.board.coords(i))
+    x, y = HISTORY_POS
+    assert game.historyAt((x, y)) is None
+    assert [game.historyAt((x, y + row*HISTORY_ROW)) for row in range(1, 6)] == [1, 2, 3, 4, None]
+    game.seek(game.historyAt((x, y + 2*HISTORY_ROW)))
+    assert list(game.board.history) == [12, 6]
+
+
+def test_panning_keeps_a_large_board_in_view(game):
+    game.size = 100
+    game.reset()
+    game.zoom(8, (300, 300))
+    for dx, dy in ((100000, 100000), (-100000, -100000)):
+        game.pan(dx, dy)
+        left, top, right, bottom = game.geometry.extent
+        # zoomed in the board is bigger than the window and still covers it
+        assert game.origin.x + left <= 0 and game.origin.x + right >= W
+        assert game.origin.y + top <= 0 and game.origin.y + bottom >= H
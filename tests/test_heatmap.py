@@ -0,0 +1,46 @@
+import time
+import threading
+from heatmap import Heatmap
+
+
+def test_the_worker_rates_every_empty_cell_and_stops(position):
+    board = position(5, [12, 6, 18])
+    published = threading.Event()
+    heatmap = Heatmap(published.set)
+    heatmap.start(board)
+    snapshot = None
+    deadline = time.perf_counter() + 10
+    while time.perf_counter() < deadline:
+        assert published.wait(10)
+        published.clear()
+        snapshot = heatmap.current(board)
+        if snapshot and snapshot.playouts >= 200:
+            break
+    assert snapshot.hash == board.hash and len(snapshot.values) == len(board.cells)
+    for value, cell in zip(snapshot.values, board.cells):
+        if cell:
+            assert value is None
+        else:
+            assert 0 <= value <= 1
+    heatmap.stop()
+    assert heatmap.current(board) is None
+    # a snapshot being made when stop came is dropped, after that nothing more is published
+    time.sleep(0.2)
+    published.clear()
+    last = heatmap.snapshot
+    time.sleep(0.3)
+    assert not published.is_set() and heatmap.snapshot is last
+
+
+def test_a_new_position_replaces_the_old_one(position):
+    first, second = position(5, [12]), position(5, [12, 7])
+    published = threading.Event()
+    heatmap = Heatmap(published.set)
+    heatmap.start(first)
+    heatmap.start(second)
+    deadline = time.perf_counter() + 10
+    while heatmap.current(second) is None and time.perf_counter() < deadline:
+        published.wait(1)
+        published.clear()
+    assert heatmap.current(second) is not None and heatmap.current(first) is None
+    heatmap.stop()
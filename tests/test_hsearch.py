@@ -0,0 +1,81 @@
+import random
+import pytest
+from hsearch import HSearch, Connections
+
+
+def wins(board, memo):
+    '''whether the player to move wins with perfect play, by minimax over every move'''
+    key = bytes(board.cells)
+    if key not in memo:
+        memo[key] = False
+        for i in [i for i, v in enumerate(board.cells) if not v]:
+            board.play(i)
+            won = board.winner() or not wins(board, memo)
+            board.undo()
+            if won:
+                memo[key] = True
+                break
+    return memo[key]
+
+
+def games(size, count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        cells = list(range(size*size))
+        rng.shuffle(cells)
+        yield cells
+
+
+# 4x4 positions are solved from the seventh move on, before that minimax takes minutes
+@pytest.mark.parametrize('size, count, start', [(3, 300, 0), (4, 150, 6)])
+def test_claims_agree_with_minimax(size, count, start, position):
+    memo = {}
+    hsearch = HSearch()
+    for moves in games(size, count, size):
+        board = position(size, moves[:start])
+        for i in moves[start:]:
+            if board.winner():
+                break
+            analysis = hsearch.analyse(board)
+            mover = board.move
+            if analysis.winner:
+                assert (analysis.winner == mover) == wins(board, memo), list(board.history)
+            for cell in analysis.wins:
+                board.play(cell)
+                assert board.winner() == mover or not wins(board, memo), (list(board.history), cell)
+                board.undo()
+            if analysis.mustplay is not None:
+                for cell in [c for c, v in enumerate(board.cells) if not v and c not in analysis.mustplay]:
+                    board.play(cell)
+                    assert board.winner() != mover and wins(board, memo), (list(board.history), cell)
+                    board.undo()
+            board.play(i)
+
+
+def test_a_win_found_in_one_move_order_is_found_in_all(position):
+    board = position(4, [12, 15, 0, 6, 13, 11, 7, 2, 4])
+    hsearch = HSearch()
+    # the positions before are analysed first, as the hints do while the game is played
+    for n in range(len(board.history) + 1):
+        analysis = hsearch.analyse(position(4, board.history[:n]))
+    assert (analysis.winner, analysis.wins, analysis.mustplay) == (2, [8], None)
+
+
+@pytest.mark.parametrize('size, count', [(4, 100), (7, 20), (11, 2)])
+def test_connections_do_not_depend_on_the_move_order(size, count, position):
+    rng = random.Random(size)
+    for moves in games(size, count, size):
+        moves = moves[:rng.randrange(size*size//2 + 2)]
+        green, blue = moves[0::2], moves[1::2]
+        rng.shuffle(green)
+        rng.shuffle(blue)
+        other = [i for pair in zip(green, blue) for i in pair] + green[len(blue):]
+        hsearch = HSearch()
+        # the cache is filled along the way as well
+        for n in range(len(other)):
+            hsearch.analyse(position(size, other[:n]))
+        first, second = position(size, moves), position(size, other)
+        for player in (1, 2):
+            fresh = Connections(first, player).build(first)
+            cached = hsearch.connections(second, player)
+            assert (fresh.full, fresh.semi) == (cached.full, cached.semi)
@@ -0,0 +1,31 @@
+import time
+import threading
+from engine import Board
+from mcts import MCTS, ParallelMCTS
+
+
+def test_search_returns_an_empty_cell(position):
+    board = position(5, [0, 6, 12])
+    move = MCTS(time_limit=None, iterations=200).search(board)
+    assert board.cells[move] == 0
+
+
+def test_parallel_search_is_cancelled_at_once():
+    ai = ParallelMCTS(workers=2, time_limit=30.0)
+    ai.start()
+    try:
+        done = []
+        thread = threading.Thread(target=lambda: done.append(ai.search(Board(7))))
+        start = time.perf_counter()
+        thread.start()
+        time.sleep(0.5)
+        ai.cancel()
+        thread.join(10)
+        assert done and time.perf_counter() - start < 5
+        # the next search does not wait behind the one that was cancelled
+        ai.time_limit = 0.2
+        start = time.perf_counter()
+        assert Board(7).cells[ai.search(Board(7))] == 0
+        assert time.perf_counter() - start < 5
+    finally:
+        ai.stop()
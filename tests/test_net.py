@@ -0,0 +1,76 @@
+import socket
+import pytest
+from net import Server, Remote
+
+
+class Writer:
+    '''collects what the server writes to a connection'''
+    def __init__(self):
+        self.lines = []
+
+    def write(self, data):
+        self.lines.append(data.decode().strip())
+
+    def is_closing(self):
+        return False
+
+
+def test_server_plays_a_game():
+    server = Server()
+    green, blue = Writer(), Writer()
+    first = server.command(['PLAY', '5'], (None, None), green)
+    second = server.command(['PLAY', '5'], (None, None), blue)
+    assert green.lines == ['GAME 1 1 5', 'START'] and blue.lines == ['GAME 1 2 5', 'START']
+    with pytest.raises(ValueError):
+        server.command(['MOVE', '0'], second, blue)
+    # green joins the top and the bottom down the first column
+    for cell, seat, writer in ((0, first, green), (1, second, blue), (5, first, green), (6, second, blue),
+                               (10, first, green), (11, second, blue), (15, first, green), (16, second, blue)):
+        server.command(['MOVE', str(cell)], seat, writer)
+    server.command(['MOVE', '20'], first, green)
+    assert blue.lines[-2:] == ['MOVE 20 1', 'WIN 1']
+
+
+@pytest.fixture
+def connection():
+    '''a Remote and the socket of the server end'''
+    listener = socket.create_server(('127.0.0.1', 0))
+    remote = Remote('127.0.0.1', listener.getsockname()[1])
+    peer, _ = listener.accept()
+    listener.close()
+    yield remote, peer
+    remote.close()
+    peer.close()
+
+
+def test_send_does_not_wait_for_a_full_socket(connection):
+    remote, peer = connection
+    line = 'PING ' + 'x'*1000
+    # far more than the socket buffers take while the server reads nothing
+    for _ in range(5000):
+        remote.send(line)
+    assert remote.outgoing
+    received = b''
+    peer.settimeout(5)
+    while len(received) < 5000*(len(line) + 1):
+        remote.poll()
+        received += peer.recv(1 << 20)
+    assert not remote.outgoing and received.split(b'\n')[0] == line.encode()
+
+
+def test_sync_leaves_a_server_that_sends_garbage():
+    from Game import Game
+    game = Game(5)
+    listener = socket.create_server(('127.0.0.1', 0))
+    game.connect('127.0.0.1', listener.getsockname()[1])
+    peer, _ = listener.accept()
+    listener.close()
+    peer.sendall(b'GAME 3 2 5\n')
+    while game.seat is None:
+        game.sync()
+    assert game.status == 'game 3, playing blue'
+    peer.sendall(b'MOVE \xff\n')
+    while game.remote:
+        game.sync()
+    assert game.status.startswith('disconnected')
+    peer.close()
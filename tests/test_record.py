@@ -0,0 +1,57 @@
+import os
+from record import Archive, MAGIC, encode, decode, toSGF, fromSGF
+
+
+def games():
+    return [(5, 1, [0, 6, 12, 18, 24]), (7, 2, [3, 10, 17]), (11, 0, [])]
+
+
+def test_append_and_read(tmp_path):
+    name = str(tmp_path / 'games.hexa')
+    with Archive(name) as archive:
+        for game in games():
+            archive.append(*game)
+        assert len(archive) == 3
+        for (size, winner, moves), record in zip(games(), archive):
+            assert (record.size, record.winner, list(record.moves)) == (size, winner, moves)
+        assert list(archive[-1].moves) == []
+
+
+def test_append_after_a_record_cut_short(tmp_path):
+    name = str(tmp_path / 'games.hexa')
+    archive = Archive(name)
+    first = archive.append(5, 1, [0, 6, 12])
+    end = os.path.getsize(name)
+    # a crash while the second record was being written leaves part of it and no index entry
+    with open(name, 'ab') as f:
+        f.write(encode(7, 2, [1, 2, 3, 4])[:5])
+    offset = archive.append(7, 2, [3, 10])
+    assert (first, offset) == (len(MAGIC), end)
+    with open(name + '.idx', 'rb') as f:
+        assert f.read()[8:] == offset.to_bytes(8, 'little')
+    assert os.path.getsize(name) == decode(open(name, 'rb').read(), offset)[1]
+    archive.close()
+    # the index is trusted as it is, without walking the file again
+    reopened = Archive(name)
+    reopened.open(check=False)
+    assert [list(r.moves) for r in reopened] == [[0, 6, 12], [3, 10]]
+    reopened.close()
+
+
+def test_reindex_drops_a_record_cut_short(tmp_path):
+    name = str(tmp_path / 'games.hexa')
+    archive = Archive(name)
+    for game in games():
+        archive.append(*game)
+    archive.close()
+    with open(name, 'ab') as f:
+        f.write(encode(5, 1, [1, 2])[:4])
+    os.remove(name + '.idx')
+    assert archive.reindex() == 3
+    assert [r.size for r in archive] == [5, 7, 11]
+    archive.close()
+
+
+def test_sgf_round_trip():
+    archive = [fromSGF(toSGF(decode(encode(*game), 0)[0]))[0] for game in games()]
+    assert [(r.size, r.winner, list(r.moves)) for r in archive] == [tuple(g) for g in games()]
@@ -0,0 +1,34 @@
+from math import sqrt
+import pygame as pg
+from consts import DARKRED, GREEN, BLUE
+from record import Archive
+from thumbnails import renderBoard, position, thumbnails, boardShape
+
+
+def centre(size, width, i):
+    '''where the centre of cell i is on a thumbnail width pixels wide'''
+    a = width/boardShape(size)[0]
+    r, c = divmod(i, size)
+    return int(a + c*3/2*a), int(a*sqrt(3) + (c + 2*r)*a*sqrt(3)/2)
+
+
+def test_a_thumbnail_shows_the_stones_at_the_cell_centres():
+    size, width = 5, 200
+    cells = position(size, [12, 6, 0])
+    surface = renderBoard(size, cells, width)
+    assert surface.get_size() == (width, int(width/boardShape(size)[0]*boardShape(size)[1]) + 1)
+    for i, col in ((12, GREEN), (6, BLUE), (0, GREEN), (24, DARKRED), (4, DARKRED)):
+        assert surface.get_at(centre(size, width, i))[:3] == col
+    # the corners outside the board stay transparent
+    assert surface.get_at((width-1, 0)).a == 0
+
+
+def test_thumbnails_of_an_archive_are_written(tmp_path):
+    with Archive(str(tmp_path / 'games.hexa')) as archive:
+        archive.append(5, 1, [12, 6, 0])
+        archive.append(7, 2, [24])
+    written = thumbnails([str(tmp_path / 'games.hexa')], str(tmp_path / 'out'), width=120, workers=1)
+    assert written == 2
+    image = pg.image.load(str(tmp_path / 'out' / 'games-0.png'))
+    assert image.get_width() == 120
+    assert image.get_at(centre(5, 120, 6))[:3] == BLUE
@@ -0,0 +1,46 @@
+import sys
+import json
+import pytest
+from engine import Board
+from HexTournament import main, makePlayer, playGame, schedule, RandomPlayer, MCTSPlayer
+
+
+def test_players_from_the_command_line():
+    assert isinstance(makePlayer('random'), RandomPlayer)
+    assert makePlayer('mcts:300').ai.iterations == 300
+    assert makePlayer('mcts:0.2s').ai.time_limit == 0.2
+
+
+@pytest.mark.parametrize('spec', ['mcts:0', 'mcts:0s', 'mcts:0.0s', 'mcts:-1', 'mcts:-2s', 'mcts:nans',
+                                  'mcts:', 'mcts:xs', 'random:1', 'alphabeta'])
+def test_players_without_a_budget_are_refused(spec):
+    with pytest.raises(ValueError):
+        makePlayer(spec)
+
+
+def test_game_ends_with_a_winner():
+    result = playGame({'id': 'a', 'seed': 1, 'size': 5, 'green': 'random', 'blue': 'mcts:50'})
+    board = Board(5)
+    for move in result['moves']:
+        assert not board.winner()
+        board.play(move)
+    assert board.winner() == result['winner']
+
+
+def test_a_resumed_run_records_every_game_once(tmp_path, monkeypatch):
+    out = str(tmp_path / 'results.jsonl')
+    run = ['HexTournament.py', '--players', 'random', 'mcts:20', '--sizes', '4', '--games', '2',
+           '--workers', '1', '--out', out]
+    monkeypatch.setattr(sys, 'argv', run)
+    main()
+    with open(out, 'rb') as f:
+        lines = f.read().splitlines(keepends=True)
+    assert len(lines) == 4
+    # killed while writing the third result
+    with open(out, 'wb') as f:
+        f.write(b''.join(lines[:2]) + lines[2][:len(lines[2])//2])
+    main()
+    main()
+    with open(out) as f:
+        ids = [json.loads(line)['id'] for line in f]
+    assert sorted(ids) == sorted(job['id'] for job in schedule(['random', 'mcts:20'], [4], 2))
@@ -0,0 +1,64 @@
+import pytest
+from ttable import TranspositionTable, ENTRY_SIZE
+
+
+def table(slots, prefer='visits'):
+    return TranspositionTable(slots*ENTRY_SIZE, prefer)
+
+
+def test_a_probe_after_a_store_hits_with_what_was_stored():
+    t = table(64)
+    assert t.store(12345, visits=40, value=0.75, depth=3, move=7)
+    assert t.probe(12345) == (40, 0.75, 3, 7)
+    assert t.probe(12345 + 64) is None
+    # the same position is always updated, whatever the slot held
+    assert t.store(12345, visits=1, value=0.25, depth=0, move=2)
+    assert t.probe(12345) == (1, 0.25, 0, 2)
+
+
+def test_more_visits_survive_a_collision():
+    t = table(8)
+    t.store(3, visits=100, value=0.5, depth=1)
+    assert not t.store(3 + 8, visits=99, value=0.5, depth=9)
+    assert t.probe(3)[0] == 100 and t.probe(3 + 8) is None
+    assert t.store(3 + 16, visits=100, value=0.5, depth=1)
+    assert t.probe(3) is None and t.probe(3 + 16)[0] == 100
+
+
+def test_more_depth_survives_a_collision():
+    t = table(8, prefer='depth')
+    t.store(5, visits=1, value=0.5, depth=6)
+    assert not t.store(5 + 8, visits=1000, value=0.5, depth=5)
+    assert t.probe(5)[2] == 6
+    assert t.store(5 + 8, visits=1, value=0.5, depth=7)
+    assert t.probe(5) is None and t.probe(5 + 8)[2] == 7
+
+
+def test_filling_past_capacity_keeps_one_entry_a_slot():
+    t = table(16)
+    for key in range(100):
+        t.store(key, visits=key, value=0.0)
+    assert len(t) == t.capacity == 16
+    # every slot holds the key with the most visits that went into it
+    assert [t.probe(key) is not None for key in range(100)] == [key >= 84 for key in range(100)]
+
+
+def test_counters_add_up():
+    t = table(16)
+    for key in range(40):
+        t.store(key, visits=40 - key, value=0.0)
+    for key in range(40):
+        t.probe(key)
+    stats = t.stats()
+    # every store either fills a slot, replaces another position or is turned away
+    assert stats['stores'] + stats['rejected'] == 40
+    assert stats['stores'] - stats['replaced'] == len(t) == 16
+    assert stats['hits'] + stats['misses'] == 40 and stats['hits'] == 16
+    assert stats['hit_rate'] == pytest.approx(16/40)
+    t.clear()
+    assert len(t) == 0 and t.hitRate() == 0.0 and t.stats()['stores'] == 0
+
+
+def test_an_unknown_policy_is_refused():
+    with pytest.raises(ValueError):
+        TranspositionTable(prefer='always')
@@ -0,0 +1,103 @@
+'''Thumbnails of finished games: boards drawn on offscreen surfaces and saved as PNG, no window needed
+
+    python thumbnails.py records/games.hexa --out thumbs --width 256
+    python thumbnails.py games/ --out thumbs        every .hexa archive and .sgf file in the folder
+
+Boards are drawn from the per size tile sprites of funcs.hexSprite on a transparent background,
+the games are spread over a pool of processes.
+'''
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+import time
+import argparse
+from math import sqrt
+from concurrent.futures import ProcessPoolExecutor
+import pygame as pg
+from funcs import *
+from consts import *
+from record import Archive, fromSGF
+
+# pixels across a thumbnail
+THUMB_WIDTH = 256
+
+
+def boardShape(size):
+    '''width and height of a board drawn with tiles of side 1, the coloured sides included'''
+    return (3*size + 1)/2, sqrt(3)*(3*size + 1)/2
+
+
+def renderBoard(size, cells, width=THUMB_WIDTH):
+    '''draws a position on a new transparent surface width pixels wide'''
+    w, h = boardShape(size)
+    a = width/w
+    outline = max(1, min(4, int(a/5)))
+    layout = geometry(size, a, outline)
+    surface = pg.Surface((width, int(a*h) + 1), pg.SRCALPHA)
+    surface.fill((0, 0, 0, 0))
+    # the top left corner of the sides is at (-a, -a*sqrt(3)) from the centre of the first cell
+    x, y = a, a*sqrt(3)
+    for col, triangle in layout.sides:
+        pg.draw.polygon(surface, col, [(x+dx, y+dy) for dx, dy in triangle])
+    sprites = [hexSprite(col, LIGHTYELLOW, a, outline) for col in (DARKRED, GREEN, BLUE)]
+    for i, value in enumerate(cells):
+        sprite = sprites[value]
+        surface.blit(sprite, sprite.get_rect(center=(x + layout.xs[i], y + layout.ys[i])))
+    return surface
+
+
+def position(size, moves):
+    '''the cells after the moves, green moves first'''
+    cells = bytearray(size*size)
+    for k, i in enumerate(moves):
+        cells[i] = 1 + k % 2
+    return cells
+
+
+def save(job):
+    '''renders one game and writes it, runs in a worker process'''
+    filename, size, moves, width = job
+    pg.image.save(renderBoard(size, position(size, moves), width), filename)
+    return filename
+
+
+def games(source):
+    '''yields (name, size, moves) for the games of an archive, an SGF file or a folder of them'''
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.endswith(('.hexa', '.sgf')):
+                yield from games(os.path.join(source, name))
+        return
+    stem = os.path.splitext(os.path.basename(source))[0]
+    if source.endswith('.sgf'):
+        with open(source) as f:
+            records = fromSGF(f.read())
+    else:
+        records = Archive(source)
+    for k, record in enumerate(records):
+        yield '{}-{}'.format(stem, k), record.size, list(record.moves)
+    if isinstance(records, Archive):
+        records.close()
+
+
+def thumbnails(sources, out, width=THUMB_WIDTH, workers=None):
+    '''writes a PNG for every game of the sources into out, returns how many were written'''
+    os.makedirs(out, exist_ok=True)
+    jobs = [(os.path.join(out, name + '.png'), size, moves, width)
+            for source in sources for name, size, moves in games(source)]
+    with ProcessPoolExecutor(workers) as pool:
+        # big chunks, so each process keeps drawing with the sprites it has cached
+        chunk = max(1, len(jobs)//(4*(workers or os.cpu_count())))
+        return sum(1 for _ in pool.map(save, jobs, chunksize=chunk))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='draws thumbnails of archived games')
+    parser.add_argument('sources', nargs='+', help='game archives, SGF files or folders of them')
+    parser.add_argument('--out', default='thumbnails')
+    parser.add_argument('--width', type=int, default=THUMB_WIDTH, help='pixels across a thumbnail')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    n = thumbnails(args.sources, args.out, args.width, args.workers)
+    print('{} thumbnails in {:.2f}s'.format(n, time.perf_counter() - start))
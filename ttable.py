@@ -0,0 +1,71 @@
+'''Fixed size transposition table for search results, indexed by Zobrist hash'''
+from array import array
+
+# bytes per entry: key, visits, value, depth, best move and the used flag
+ENTRY_SIZE = 8 + 4 + 4 + 2 + 4 + 1
+
+
+class TranspositionTable:
+    '''one entry per slot, a colliding store replaces the entry with fewer visits (or smaller depth)'''
+    def __init__(self, memory=16*2**20, prefer='visits'):
+        if prefer not in ('visits', 'depth'):
+            raise ValueError('prefer must be "visits" or "depth"')
+        self.prefer = prefer
+        self.capacity = max(1, memory//ENTRY_SIZE)
+        self.keys = array('Q', bytes(8*self.capacity))
+        self.visits = array('I', bytes(4*self.capacity))
+        self.value = array('f', bytes(4*self.capacity))
+        self.depth = array('H', bytes(2*self.capacity))
+        self.move = array('i', bytes(4*self.capacity))
+        self.used = bytearray(self.capacity)
+        self.clear()
+
+    def clear(self):
+        self.used[:] = bytes(self.capacity)
+        self.hits = self.misses = 0
+        self.stores = self.replaced = self.rejected = 0
+
+    def __len__(self):
+        return self.used.count(1)
+
+    def memory(self):
+        return self.capacity*ENTRY_SIZE
+
+    def probe(self, key):
+        '''returns (visits, value, depth, move) stored for a position or None'''
+        i = key % self.capacity
+        if self.used[i] and self.keys[i] == key:
+            self.hits += 1
+            return self.visits[i], self.value[i], self.depth[i], self.move[i]
+        self.misses += 1
+        return None
+
+    def store(self, key, visits, value, depth=0, move=-1):
+        '''saves a result unless the slot holds another position that is worth more'''
+        i = key % self.capacity
+        if self.used[i] and self.keys[i] != key:
+            if self.prefer == 'visits':
+                better = (visits, depth) >= (self.visits[i], self.depth[i])
+            else:
+                better = (depth, visits) >= (self.depth[i], self.visits[i])
+            if not better:
+                self.rejected += 1
+                return False
+            self.replaced += 1
+        self.keys[i] = key
+        self.visits[i] = min(visits, 0xffffffff)
+        self.value[i] = value
+        self.depth[i] = min(depth, 0xffff)
+        self.move[i] = move
+        self.used[i] = 1
+        self.stores += 1
+        return True
+
+    def hitRate(self):
+        probes = self.hits + self.misses
+        return self.hits/probes if probes else 0.0
+
+    def stats(self):
+        return {'capacity': self.capacity, 'memory': self.memory(), 'hits': self.hits,
+                'misses': self.misses, 'hit_rate': self.hitRate(), 'stores': self.stores,
+                'replaced': self.replaced, 'rejected': self.rejected}